@@ -0,0 +1,39 @@
+import functools
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def run_view(view, request, *args, **kwargs):
+    # поток пула живёт дольше запроса: соединения с БД закрываем и
+    # проверяем так же, как Django на request_started/request_finished
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            for wrapper in getattr(request, '_execute_wrappers', ()):
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Async-обёртка над синхронным view DRF для ASGI-режима.
+
+    Django 3.2 выполняет синхронные view под ASGI в одном потоке на
+    процесс, а ORM у него только синхронный. Чтение поэтому уходит
+    в пул потоков (thread_sensitive=False) и выполняется параллельно,
+    а запросы на запись остаются в общем потоке, как у обычных view.
+    """
+    run_parallel = sync_to_async(run_view, thread_sensitive=False)
+    run_serial = sync_to_async(run_view, thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        run = run_parallel if request.method in SAFE_METHODS else run_serial
+        return await run(view, request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,133 @@
+import statistics
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, User
+
+# name -> (url, нужна ли авторизация)
+ENDPOINTS = {
+    'recipes': ('/api/recipes/?page=1&limit=6', True),
+    'recipes_anonymous': ('/api/recipes/?page=1&limit=6', False),
+    'recipe': ('/api/recipes/{recipe_id}/', True),
+    'subscriptions': (
+        '/api/users/subscriptions/?limit=6&recipes_limit=3',
+        True,
+    ),
+    'ingredients': ('/api/ingredients/?name={ingredient_prefix}', False),
+    'download_shopping_cart': ('/api/recipes/download_shopping_cart/', True),
+}
+
+# бюджеты по умолчанию; переопределяются файлом --budgets.
+# После прогрева токен авторизации берётся из кэша, без запроса к БД
+BUDGETS = {
+    'recipes': {'queries': 5, 'p95_ms': 500},
+    'recipes_anonymous': {'queries': 4, 'p95_ms': 500},
+    'recipe': {'queries': 4, 'p95_ms': 300},
+    'subscriptions': {'queries': 4, 'p95_ms': 500},
+    'ingredients': {'queries': 1, 'p95_ms': 100},
+    'download_shopping_cart': {'queries': 1, 'p95_ms': 500},
+}
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+def get_benchmark_user(email=None):
+    if email:
+        return User.objects.get(email=email)
+    # пользователь с подписками и списком покупок нагружает API сильнее
+    return (
+        User.objects.filter(
+            subscriber__isnull=False, purchases__isnull=False
+        ).first()
+        or User.objects.order_by('pk').first()
+    )
+
+
+def get_url_params():
+    recipe = Recipe.objects.order_by('-pub_date', '-pk').first()
+    ingredient = Ingredient.objects.order_by('pk').first()
+    return {
+        'recipe_id': recipe.pk if recipe else 0,
+        'ingredient_prefix': ingredient.name[:3] if ingredient else '',
+    }
+
+
+def measure(client, url, repeat, warmup):
+    for _ in range(warmup):
+        client.get(url)
+    latencies, queries, db_times = [], [], []
+    status_code = size = None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = client.get(url)
+            content = (
+                b''.join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+        db_times.append(
+            sum(float(query['time']) for query in context.captured_queries)
+            * 1000
+        )
+        status_code, size = response.status_code, len(content)
+    return {
+        'url': url,
+        'status': status_code,
+        'queries': max(queries),
+        'db_ms': statistics.mean(db_times),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'bytes': size,
+    }
+
+
+def get_requests(email=None, endpoints=None):
+    """Возвращает {name: (client, url)} для выбранных эндпоинтов."""
+    user = get_benchmark_user(email)
+    if user is None:
+        raise ValueError('В базе нет пользователей')
+    token, _ = Token.objects.get_or_create(user=user)
+    clients = {
+        True: Client(
+            HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token.key}'
+        ),
+        False: Client(HTTP_HOST='localhost'),
+    }
+    params = get_url_params()
+    requests = {}
+    for name in endpoints or ENDPOINTS:
+        url, authenticated = ENDPOINTS[name]
+        requests[name] = (clients[authenticated], url.format(**params))
+    return requests
+
+
+def run_benchmark(repeat=20, warmup=2, email=None, endpoints=None):
+    return {
+        name: measure(client, url, repeat, warmup)
+        for name, (client, url) in get_requests(email, endpoints).items()
+    }
+
+
+def check_budgets(results, budgets):
+    violations = []
+    for name, result in results.items():
+        if result['status'] != 200:
+            violations.append(f'{name}: статус ответа {result["status"]}')
+        for metric, limit in budgets.get(name, {}).items():
+            if result[metric] > limit:
+                violations.append(
+                    f'{name}: {metric} = {result[metric]:.0f} '
+                    f'(бюджет {limit})'
+                )
+    return violations
@@ -0,0 +1,105 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from foodgram.cache import get_version
+from foodgram.metrics import cache_hit
+
+RESPONSE_KEY = 'foodgram:response:{}'
+
+
+def is_conditional(request):
+    return (
+        'HTTP_IF_NONE_MATCH' in request.META
+        or 'HTTP_IF_MODIFIED_SINCE' in request.META
+    )
+
+
+def make_etag(*parts):
+    return '"{}"'.format(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional_response(request, response, etag, last_modified=None):
+    """Проставляет ETag/Last-Modified и отвечает 304, если они совпали."""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Authorization',))
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified,
+        response=response,
+    )
+
+
+class CachedResponseMixin:
+    """Кэширует list/retrieve для анонимных пользователей.
+
+    Ключ строится из версий cache_versions и нормализованных параметров
+    cache_params, поэтому при изменении данных старые ответы просто
+    перестают запрашиваться. Запросы с другими параметрами в кэш не идут.
+    """
+
+    cache_versions = ()
+    cache_params = ()
+    cache_timeout = 60 * 60
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_timeout(self):
+        return self.cache_timeout
+
+    def get_cache_key(self, request, versions):
+        params = sorted(
+            (name, sorted(request.query_params.getlist(name)))
+            for name in request.query_params
+        )
+        # в ответе абсолютные ссылки next/previous и на картинки
+        raw_key = repr(
+            (
+                request.get_host(),
+                request.is_secure(),
+                self.basename,
+                self.action,
+                self.kwargs,
+                params,
+                versions,
+            )
+        )
+        return hashlib.md5(raw_key.encode()).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if (
+            not request.user.is_anonymous
+            or request.query_params.keys() - set(self.cache_params)
+        ):
+            return handler(request, *args, **kwargs)
+
+        versions = [
+            get_version(namespace) for namespace in self.cache_versions
+        ]
+        key = self.get_cache_key(request, versions)
+        data = cache.get(RESPONSE_KEY.format(key))
+        cache_hit(f'response:{self.basename}', data is not None)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            data = response.data
+            cache.set(RESPONSE_KEY.format(key), data, self.get_cache_timeout())
+
+        # версия — время последнего изменения данных в наносекундах
+        last_modified = max(versions) // 10 ** 9 if versions else None
+        return conditional_response(
+            request, Response(data), f'"{key}"', last_modified
+        )
@@ -0,0 +1,86 @@
+import json
+
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+
+
+def capture_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return [
+        query['sql']
+        for query in context.captured_queries
+        if query['sql'].lstrip().upper().startswith('SELECT')
+    ]
+
+
+def get_table_rows(table):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table]
+            )
+            row = cursor.fetchone()
+            return int(row[0]) if row else 0
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+        )
+        return cursor.fetchone()[0]
+
+
+def walk_plan(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from walk_plan(child)
+
+
+def find_seq_scans(sql):
+    """Возвращает таблицы, которые план запроса читает целиком."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return [
+                node['Relation Name']
+                for node in walk_plan(plan[0]['Plan'])
+                if node['Node Type'] == 'Seq Scan'
+            ]
+        # SQLite: строки вида "SCAN recipes_recipe" без индекса
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        tables = []
+        for row in cursor.fetchall():
+            words = row[-1].split()
+            if words[0] != 'SCAN' or 'INDEX' in words:
+                continue
+            words = words[1:]
+            if words[0] == 'TABLE':
+                words = words[1:]
+            tables.append(words[0])
+        return tables
+
+
+def explain_endpoint(client, url, min_rows):
+    """Возвращает (число запросов, [(таблица, строк, sql)])."""
+    queries = capture_queries(client, url)
+    # в плане SQLite бывают подзапросы и псевдонимы вместо таблиц
+    known_tables = set(connection.introspection.table_names())
+    table_rows = {}
+    seq_scans = []
+    for sql in queries:
+        try:
+            tables = find_seq_scans(sql)
+        except DatabaseError as error:
+            seq_scans.append((None, 0, f'{error}: {sql}'))
+            continue
+        for table in tables:
+            if table not in known_tables:
+                continue
+            if table not in table_rows:
+                table_rows[table] = get_table_rows(table)
+            if table_rows[table] >= min_rows:
+                seq_scans.append((table, table_rows[table], sql))
+    return len(queries), seq_scans
@@ -0,0 +1,80 @@
+import csv
+import json
+
+from rest_framework.negotiation import DefaultContentNegotiation
+
+RENDERERS = {}
+
+
+def register_renderer(renderer_class):
+    RENDERERS[renderer_class.format] = renderer_class
+    return renderer_class
+
+
+class ShoppingListRenderer:
+    """Базовый класс выгрузки списка покупок.
+
+    render() получает итератор строк (name, measurement_unit, amount)
+    и отдаёт документ по частям, не собирая его целиком в памяти.
+    """
+
+    format = None
+    media_type = None
+
+    def render(self, rows):
+        raise NotImplementedError
+
+    def get_filename(self):
+        return f'shoplist.{self.format}'
+
+
+@register_renderer
+class TextRenderer(ShoppingListRenderer):
+    format = 'txt'
+    media_type = 'text/plain; charset=utf-8'
+
+    def render(self, rows):
+        for name, measurement_unit, amount in rows:
+            yield f'{name} - {amount} {measurement_unit} \n'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+@register_renderer
+class CsvRenderer(ShoppingListRenderer):
+    format = 'csv'
+    media_type = 'text/csv; charset=utf-8'
+
+    def render(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for row in rows:
+            yield writer.writerow(row)
+
+
+@register_renderer
+class JsonRenderer(ShoppingListRenderer):
+    format = 'json'
+    media_type = 'application/json'
+
+    def render(self, rows):
+        separator = '['
+        for name, measurement_unit, amount in rows:
+            item = {
+                'name': name,
+                'measurement_unit': measurement_unit,
+                'amount': amount,
+            }
+            yield separator + json.dumps(item, ensure_ascii=False)
+            separator = ','
+        yield ']' if separator == ',' else '[]'
+
+
+class IgnoreFormatNegotiation(DefaultContentNegotiation):
+    """Параметр ?format= выбирает формат выгрузки, а не рендерер DRF."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -1,38 +1,62 @@
 from django_filters import rest_framework as filters
 
-from recipes.models import Ingredient, Recipe, Tag, User
+from recipes.catalogue import tag_registry
+from recipes.models import Ingredient, Recipe, User
+
+
+def tag_choices():
+    # FilterSet копирует фильтры через deepcopy, поэтому здесь функция,
+    # а не метод реестра: реестр с блокировкой не копируется
+    return tag_registry.choices()
 
 
 class IngredientFilter(filters.FilterSet):
-    name = filters.CharFilter(field_name='name', lookup_expr='istartswith')
+    name = filters.CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ('name', 'measurement_unit')
 
+    def filter_name(self, queryset, name, value):
+        return queryset.search(value)
+
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
+    # slug тегов проверяются и переводятся в id по реестру в памяти,
+    # без запроса к таблице тегов
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices, method='filter_tags'
     )
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'Популярные'),), method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
 
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(
+            tags__id__in=tag_registry.ids(value)
+        ).distinct()
+
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorite_recipe__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(customers__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
         return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        # счётчики хранятся в рецепте, join с избранным не нужен
+        return queryset.order_by('-favorites_count', '-pub_date', '-id')
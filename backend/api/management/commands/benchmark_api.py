@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import BUDGETS, ENDPOINTS, check_budgets, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряем число SQL-запросов, время БД, задержку и размер '
+        'ответа основных эндпоинтов API и сверяем их с бюджетами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--user', help='email пользователя, от имени которого замеряем'
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=sorted(ENDPOINTS),
+            help='Замерить только указанные эндпоинты',
+        )
+        parser.add_argument(
+            '--budgets', help='JSON-файл с бюджетами вместо встроенных'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def handle(self, *args, **options):
+        budgets = BUDGETS
+        if options['budgets']:
+            with open(options['budgets'], encoding='utf-8') as file:
+                budgets = json.load(file)
+        try:
+            results = run_benchmark(
+                repeat=options['repeat'],
+                warmup=options['warmup'],
+                email=options['user'],
+                endpoints=options['endpoint'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write(
+                f'{"endpoint":<24}{"queries":>8}{"db ms":>9}'
+                f'{"p50 ms":>9}{"p95 ms":>9}{"bytes":>10}'
+            )
+            for name, result in results.items():
+                self.stdout.write(
+                    f'{name:<24}{result["queries"]:>8}'
+                    f'{result["db_ms"]:>9.1f}{result["p50_ms"]:>9.1f}'
+                    f'{result["p95_ms"]:>9.1f}{result["bytes"]:>10}'
+                )
+
+        violations = check_budgets(results, budgets)
+        if violations:
+            raise CommandError(
+                'Превышены бюджеты:\n' + '\n'.join(violations)
+            )
+        self.stdout.write(self.style.SUCCESS('Все бюджеты соблюдены'))
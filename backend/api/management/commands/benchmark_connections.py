@@ -0,0 +1,79 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+from api.benchmark import percentile
+from recipes.models import Tag
+
+# режим -> CONN_MAX_AGE
+MODES = {
+    'new': 0,
+    'persistent': None,
+}
+
+
+def emulate_request():
+    # так же, как обработчик запроса Django: close_old_connections
+    # на request_started и request_finished; проверка соединения
+    # (foodgram.db) выполняется перед первым запросом к БД
+    close_old_connections()
+    started = time.perf_counter()
+    list(Tag.objects.all())
+    elapsed = (time.perf_counter() - started) * 1000
+    close_old_connections()
+    return elapsed
+
+
+def run_worker(requests):
+    try:
+        return [emulate_request() for _ in range(requests)]
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравниваем задержку небольшого запроса (как в /api/tags/) '
+        'с новым соединением на каждый запрос и с постоянными соединениями '
+        'при параллельной нагрузке'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--requests', type=int, default=200, help='Запросов на поток'
+        )
+        parser.add_argument(
+            '--mode', action='append', choices=sorted(MODES)
+        )
+
+    def handle(self, *args, **options):
+        settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+        original = settings_dict['CONN_MAX_AGE']
+        self.stdout.write(f'ENGINE: {settings_dict["ENGINE"]}')
+        self.stdout.write(
+            f'{"mode":<12}{"p50 ms":>9}{"p95 ms":>9}{"mean ms":>9}{"rps":>9}'
+        )
+        try:
+            for mode in options['mode'] or MODES:
+                settings_dict['CONN_MAX_AGE'] = MODES[mode]
+                connections.close_all()
+                self.report(mode, options['concurrency'], options['requests'])
+        finally:
+            settings_dict['CONN_MAX_AGE'] = original
+
+    def report(self, mode, concurrency, requests):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = executor.map(run_worker, [requests] * concurrency)
+            latencies = [value for result in results for value in result]
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{mode:<12}{percentile(latencies, 50):>9.2f}'
+            f'{percentile(latencies, 95):>9.2f}'
+            f'{statistics.mean(latencies):>9.2f}'
+            f'{len(latencies) / elapsed:>9.0f}'
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import ENDPOINTS, get_requests
+from api.explain import explain_endpoint
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняем EXPLAIN для SQL-запросов основных эндпоинтов API '
+        'и ищем полные просмотры больших таблиц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='email пользователя, от имени которого запрашиваем'
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=sorted(ENDPOINTS),
+            help='Проверить только указанные эндпоинты',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=10000,
+            help='Таблицы меньше этого размера не считаются большими',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            requests = get_requests(options['user'], options['endpoint'])
+        except ValueError as error:
+            raise CommandError(error)
+
+        found = 0
+        for name, (client, url) in requests.items():
+            count, seq_scans = explain_endpoint(
+                client, url, options['min_rows']
+            )
+            self.stdout.write(f'{name}: {url}, запросов: {count}')
+            for table, rows, sql in seq_scans:
+                found += 1
+                if table is None:
+                    self.stdout.write(self.style.WARNING(f'  {sql}'))
+                    continue
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'  Seq Scan {table} (~{rows} строк): {sql[:300]}'
+                    )
+                )
+
+        if found:
+            raise CommandError(f'Найдено полных просмотров таблиц: {found}')
+        self.stdout.write(
+            self.style.SUCCESS('Полных просмотров больших таблиц нет')
+        )
@@ -0,0 +1,119 @@
+import statistics
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import percentile
+
+# горячие эндпоинты чтения, которые в ASGI-режиме работают как async view
+PATHS = (
+    '/api/recipes/?page=1&limit=6',
+    '/api/tags/',
+    '/api/ingredients/?name=мол',
+    '/api/users/subscriptions/?limit=6&recipes_limit=3',
+)
+
+
+def fetch(url, headers):
+    started = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), timeout=30) as response:
+            response.read()
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+    except (URLError, OSError):
+        status = None
+    return status, (time.perf_counter() - started) * 1000
+
+
+def run_client(urls, headers, deadline):
+    results = []
+    index = 0
+    while time.monotonic() < deadline:
+        url = urls[index % len(urls)]
+        results.append((url, *fetch(url, headers)))
+        index += 1
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружаем запущенный сервер параллельными запросами к горячим '
+        'эндпоинтам чтения, чтобы сравнить режимы WSGI и ASGI'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument(
+            '--path',
+            action='append',
+            help='Эндпоинт для нагрузки; по умолчанию — горячие эндпоинты',
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument(
+            '--duration', type=float, default=30, help='Секунд нагрузки'
+        )
+        parser.add_argument('--token', help='Токен авторизации')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or PATHS
+        if not options['token']:
+            # подписки без авторизации недоступны
+            paths = [path for path in paths if 'subscriptions' not in path]
+        urls = [
+            options['base_url'].rstrip('/') + quote(path, safe='/?=&')
+            for path in paths
+        ]
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+
+        concurrency = options['concurrency']
+        deadline = time.monotonic() + options['duration']
+        with ThreadPoolExecutor(concurrency) as executor:
+            # клиенты начинают с разных эндпоинтов
+            shifts = [index % len(urls) for index in range(concurrency)]
+            batches = executor.map(
+                run_client,
+                [urls[shift:] + urls[:shift] for shift in shifts],
+                [headers] * concurrency,
+                [deadline] * concurrency,
+            )
+            results = [result for batch in batches for result in batch]
+        if not results:
+            raise CommandError('Не выполнено ни одного запроса')
+
+        errors = Counter(
+            status or 'нет ответа'
+            for _, status, _ in results
+            if status != 200
+        )
+        self.stdout.write(
+            f'запросов: {len(results)}, ошибок: {sum(errors.values())}, '
+            f'rps: {len(results) / options["duration"]:.0f}'
+        )
+        if errors:
+            self.stdout.write(
+                'ошибки: '
+                + ', '.join(f'{key}: {value}' for key, value in errors.items())
+            )
+        self.report('все', [latency for _, _, latency in results])
+        by_path = defaultdict(list)
+        for url, _, latency in results:
+            by_path[paths[urls.index(url)]].append(latency)
+        for path, latencies in by_path.items():
+            self.report(path, latencies)
+
+    def report(self, name, latencies):
+        self.stdout.write(
+            f'{name}: p50 {percentile(latencies, 50):.1f} ms, '
+            f'p95 {percentile(latencies, 95):.1f} ms, '
+            f'p99 {percentile(latencies, 99):.1f} ms, '
+            f'среднее {statistics.mean(latencies):.1f} ms'
+        )
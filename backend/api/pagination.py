@@ -1,5 +1,202 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
 
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    LimitOffsetPagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class CustomPagination(PageNumberPagination):
+
+def approximate_count(queryset):
+    # без фильтров на PostgreSQL берём оценку из статистики планировщика,
+    # чтобы не делать COUNT(*) по всей таблице
+    connection = connections[queryset.db]
+    if not queryset.query.where and connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1 — таблицу ещё ни разу не анализировали
+        if row is not None and row[0] >= 0:
+            return int(row[0])
+    return queryset.count()
+
+
+class KeysetPaginationMixin:
+    """Пагинация по курсору, включается параметром ?cursor.
+
+    Курсор хранит значения полей keyset_ordering последнего объекта
+    страницы, поэтому следующая страница выбирается по индексу
+    за одно и то же время на любой глубине и не съезжает, когда
+    добавляются новые записи. Первая страница — ?cursor= без значения.
+    Общее число записей отдаётся только по запросу: ?count=exact
+    или приблизительное ?count=approximate.
+    """
+
+    keyset_ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    cursor_page_size = 10
+    cursor_max_page_size = 100
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = self.get_keyset_ordering(queryset)
+        self.cursor_count = self.get_cursor_count(queryset, request)
+        position, reverse = self.decode_cursor(request, queryset)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self.invert(field) for field in ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        page_size = self.get_cursor_page_size(request)
+        results = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.results = results
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response = {}
+        if self.cursor_count is not None:
+            response['count'] = self.cursor_count
+        response['next'] = self.get_cursor_link(self.has_next, -1, False)
+        response['previous'] = self.get_cursor_link(
+            self.has_previous, 0, True
+        )
+        response['results'] = data
+        return Response(response)
+
+    def get_keyset_ordering(self, queryset):
+        # явный order_by (например ?ordering=popular) важнее порядка
+        # по умолчанию; он должен заканчиваться уникальным полем
+        return tuple(queryset.query.order_by) or self.keyset_ordering
+
+    def get_cursor_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode is None:
+            return None
+        if mode == 'exact':
+            return queryset.count()
+        return approximate_count(queryset)
+
+    def get_cursor_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.cursor_max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.cursor_page_size
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def after(ordering, position):
+        # (a, b) после (x, y): a после x или a = x и b после y
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            position.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+        return position
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            position, reverse = cursor['p'], bool(cursor.get('r'))
+        except (BinasciiError, UnicodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        # курсор приходит от клиента: значения приводим к типам полей,
+        # иначе подделанный курсор падал бы в запросе к БД
+        try:
+            position = [
+                self.parse_value(queryset.model, field, value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    @staticmethod
+    def parse_value(model, field, value):
+        if value is None or isinstance(value, (dict, list)):
+            raise ValueError(value)
+        return model._meta.get_field(field.lstrip('-')).to_python(value)
+
+    def encode_cursor(self, position, reverse):
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        encoded = b64encode(json.dumps(cursor).encode()).decode('ascii')
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encoded,
+        )
+
+    def get_cursor_link(self, has_page, index, reverse):
+        if not has_page or not self.results:
+            return None
+        return self.encode_cursor(
+            self.get_position(self.results[index]), reverse
+        )
+
+
+class CustomPagination(KeysetPaginationMixin, PageNumberPagination):
+    page_size_query_param = 'limit'
+    keyset_ordering = ('-pub_date', '-id')
+
+
+class UserPagination(KeysetPaginationMixin, LimitOffsetPagination):
+    page_size_query_param = 'limit'
+    keyset_ordering = ('id',)
+
+
+class SubscribePagination(KeysetPaginationMixin, LimitOffsetPagination):
     page_size_query_param = 'limit'
+    keyset_ordering = ('-id',)
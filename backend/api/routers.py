@@ -0,0 +1,22 @@
+from django.conf import settings
+from rest_framework.routers import DefaultRouter
+
+from .async_views import async_view
+
+
+class Router(DefaultRouter):
+    """DefaultRouter, который в ASGI-режиме отдаёт async view.
+
+    Оборачиваются только viewset с async_reads = True: горячие
+    эндпоинты чтения. Остальные работают как обычные view.
+    """
+
+    def get_urls(self):
+        urls = super().get_urls()
+        if not settings.ASYNC_VIEWS:
+            return urls
+        for url in urls:
+            viewset = getattr(url.callback, 'cls', None)
+            if getattr(viewset, 'async_reads', False):
+                url.callback = async_view(url.callback)
+        return urls
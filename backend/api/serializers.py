@@ -1,10 +1,12 @@
 from django.db import transaction
-from django.shortcuts import get_object_or_404
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from jobs.queue import enqueue
+from recipes.images import check_image_file
 from recipes.models import (
     Favorites,
+    ImageStatus,
     Ingredient,
     Recipe,
     RecipeIngredient,
@@ -12,10 +14,30 @@ from recipes.models import (
     Tag,
     User,
 )
+from recipes.tasks import process_recipe_image
 from users.serializers import UserSerializer
 
 
+def parse_int(value):
+    # int() молча превращает 1.5 и True в 1, поэтому принимаем только
+    # целые числа и строки с ними
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError(value)
+    return int(value)
+
+
+class RecipeImageField(Base64ImageField):
+    # в ленте отдаём средний вариант картинки, в рецепте — полный
+    def get_attribute(self, instance):
+        view = self.context.get('view')
+        if getattr(view, 'action', None) == 'list':
+            return instance.preview
+        return super().get_attribute(instance)
+
+
 class FollowerRecipeSerializer(serializers.ModelSerializer):
+    image = serializers.ImageField(source='thumbnail', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -45,7 +67,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = RecipeImageField()
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = RecipeIngredientSerializer(
@@ -71,19 +93,25 @@ class RecipeSerializer(serializers.ModelSerializer):
             'cooking_time',
             'is_in_shopping_cart',
             'is_favorited',
+            'image_status',
         )
         read_only_fields = (
             'is_in_shopping_cart',
             'is_favorited',
+            'image_status',
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
         return Favorites.objects.filter(user=request.user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
@@ -91,61 +119,144 @@ class RecipeSerializer(serializers.ModelSerializer):
             user=request.user, recipe=obj
         ).exists()
 
+    def validate_image(self, image):
+        try:
+            check_image_file(image)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
+        return image
+
     def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        ingredients_set = set()
+        data['ingredients'] = self.validate_ingredient_amounts(
+            self.initial_data.get('ingredients')
+        )
+        data['tags'] = self.validate_tag_ids(self.initial_data.get('tags'))
+        return data
+
+    @staticmethod
+    def validate_ingredient_amounts(ingredients):
+        if not ingredients or not isinstance(ingredients, list):
+            raise serializers.ValidationError(
+                'Нужно указать хотя бы один ингредиент.'
+            )
+        amounts = {}
         for ingredient in ingredients:
-            if int(ingredient.get('amount')) <= 0:
+            try:
+                id = parse_int(ingredient['id'])
+                amount = parse_int(ingredient['amount'])
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError(
+                    'У ингредиента должны быть числовые id и amount.'
+                )
+            if amount <= 0:
                 raise serializers.ValidationError(
                     ('количество ингредиента  должно быть больше 0')
                 )
-            id = ingredient.get('id')
-            if id in ingredients_set:
+            if id in amounts:
                 raise serializers.ValidationError(
                     'Ингредиент в рецепте должен быть уникальным.'
                 )
-            ingredients_set.add(id)
-        data['ingredients'] = ingredients
-
-        return data
+            amounts[id] = amount
+        existing_ingredients = Ingredient.objects.filter(
+            pk__in=amounts
+        ).count()
+        if existing_ingredients != len(amounts):
+            raise serializers.ValidationError(
+                'Указан несуществующий ингредиент.'
+            )
+        return [
+            {'id': id, 'amount': amount} for id, amount in amounts.items()
+        ]
 
-    def add_tags(self, instance):
-        tags = self.initial_data.get('tags')
-        for tag_id in tags:
-            instance.tags.add(get_object_or_404(Tag, pk=tag_id))
-        return instance
+    @staticmethod
+    def validate_tag_ids(tags):
+        if not tags or not isinstance(tags, list):
+            raise serializers.ValidationError(
+                'Нужно указать хотя бы один тег.'
+            )
+        try:
+            tags = {parse_int(tag) for tag in tags}
+        except (TypeError, ValueError):
+            raise serializers.ValidationError(
+                'У тега должен быть числовой id.'
+            )
+        existing_tags = list(
+            Tag.objects.filter(pk__in=tags).values_list('pk', flat=True)
+        )
+        if len(existing_tags) != len(tags):
+            raise serializers.ValidationError('Указан несуществующий тег.')
+        return existing_tags
 
     @staticmethod
     def add_ingredients(ingredients, instance):
-        for ingredient in ingredients:
-            ingredients_amounts = RecipeIngredient.objects.create(
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
                 recipe=instance,
                 ingredient_id=ingredient.get('id'),
                 amount=ingredient.get('amount'),
             )
-            ingredients_amounts.save()
+            for ingredient in ingredients
+        )
+
+    @staticmethod
+    def update_ingredients(ingredients, instance):
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in instance.recipe_ingredients.all()
+        }
+
+        removed = current.keys() - amounts.keys()
+        if removed:
+            instance.recipe_ingredients.filter(
+                ingredient_id__in=removed
+            ).delete()
+
+        changed = []
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=instance, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        )
 
     @transaction.atomic
     def create(self, validated_data):
-        image = validated_data.pop('image')
         ingredients = validated_data.pop('ingredients')
-        instance = Recipe.objects.create(image=image, **validated_data)
-        instance = self.add_tags(instance)
+        tags = validated_data.pop('tags')
+        instance = Recipe.objects.create(
+            image_status=ImageStatus.PENDING, **validated_data
+        )
+        enqueue(process_recipe_image, recipe_id=instance.pk)
+        instance.tags.set(tags)
         self.add_ingredients(ingredients, instance)
         return instance
 
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags')
+        if 'image' in validated_data:
+            # варианты старой картинки больше не подходят
+            instance.image_medium = instance.image_thumbnail = ''
+            instance.image_status = ImageStatus.PENDING
+            enqueue(process_recipe_image, recipe_id=instance.pk)
         super().update(instance, validated_data)
 
-        instance.tags.clear()
-        instance = self.add_tags(instance)
-
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        self.add_ingredients(ingredients, instance)
-
-        instance.save()
+        instance.tags.set(tags)
+        self.update_ingredients(ingredients, instance)
         return instance
 
 
@@ -164,7 +275,7 @@ class FavoriteSerializer(serializers.ModelSerializer):
             user=request.user, recipe__id=recipe_id
         ).exists()
 
-        if request.method == 'GET' and favorite_exists:
+        if request.method == 'POST' and favorite_exists:
             raise serializers.ValidationError(
                 'Рецепт уже добавлен в избранное'
             )
@@ -180,19 +291,19 @@ class ShoppingCartSerializer(FavoriteSerializer):
     class Meta(FavoriteSerializer.Meta):
         model = ShoppingCart
 
-        def validate(self, data):
-            request = self.context.get('request')
-            recipe_id = data['recipe'].id
-            purchase_exists = ShoppingCart.objects.filter(
-                user=request.user, recipe__id=recipe_id
-            ).exists()
+    def validate(self, data):
+        request = self.context.get('request')
+        recipe_id = data['recipe'].id
+        purchase_exists = ShoppingCart.objects.filter(
+            user=request.user, recipe__id=recipe_id
+        ).exists()
 
-            if request.method == 'POST' and purchase_exists:
-                raise serializers.ValidationError(
-                    'Рецепт уже присутсвтует в списке покупок'
-                )
+        if request.method == 'POST' and purchase_exists:
+            raise serializers.ValidationError(
+                'Рецепт уже присутсвтует в списке покупок'
+            )
 
-            return data
+        return data
 
     def to_representation(self, instance):
         request = self.context.get('request')
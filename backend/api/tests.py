@@ -0,0 +1,384 @@
+import json
+from base64 import b64encode
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from recipes.models import (
+    Favorites,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+    User,
+)
+from users.models import Subscribe
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+}
+
+
+def encode_cursor(cursor):
+    return b64encode(json.dumps(cursor).encode()).decode()
+
+
+def create_user(index):
+    return User.objects.create_user(
+        email=f'user{index}@example.com',
+        username=f'user{index}',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password-123',
+    )
+
+
+@override_settings(CACHES=TEST_CACHES, REQUEST_TIMING_SAMPLE_RATE=0)
+class APITestBase(APITestCase):
+    recipes_count = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(1)
+        cls.user = create_user(2)
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {i}', slug=f'tag{i}', color='#FF0000'
+            )
+            for i in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {i}', measurement_unit='г'
+            )
+            for i in range(5)
+        ]
+        cls.recipes = []
+        for i in range(cls.recipes_count):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {i}',
+                text='Текст',
+                cooking_time=5,
+            )
+            recipe.tags.set(cls.tags[: i % 3 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in cls.ingredients[: i % 5 + 1]
+            )
+            cls.recipes.append(recipe)
+        Favorites.objects.create(user=cls.user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[1])
+        Subscribe.objects.create(user=cls.user, subscribing=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+
+class RecipeQueriesTest(APITestBase):
+    """Число запросов к БД не зависит от размера страницы."""
+
+    def test_list_anonymous(self):
+        for limit in (1, 3, self.recipes_count):
+            with self.subTest(limit=limit), self.assertNumQueries(4):
+                response = self.client.get(f'/api/recipes/?limit={limit}')
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_authenticated(self):
+        self.client.force_authenticate(self.user)
+        for limit in (1, 3, self.recipes_count):
+            with self.subTest(limit=limit), self.assertNumQueries(5):
+                response = self.client.get(f'/api/recipes/?limit={limit}')
+            self.assertEqual(len(response.data['results']), limit)
+        self.assertTrue(response.data['results'][-1]['is_favorited'])
+
+    def test_retrieve(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertTrue(response.data['author']['is_subscribed'])
+
+
+class RecipeValidationTest(APITestBase):
+    def patch(self, ingredients, tags=None):
+        self.client.force_authenticate(self.author)
+        return self.client.patch(
+            f'/api/recipes/{self.recipes[0].id}/',
+            {
+                'tags': [self.tags[0].id] if tags is None else tags,
+                'ingredients': ingredients,
+            },
+            format='json',
+        )
+
+    def test_invalid_ingredients(self):
+        for ingredients in (
+            [],
+            [{'amount': 3}],
+            [{'id': 'abc', 'amount': 3}],
+            [{'id': self.ingredients[0].id}],
+            ['abc'],
+            [{'id': 0, 'amount': 3}],
+            [{'id': self.ingredients[0].id, 'amount': 0}],
+            [{'id': self.ingredients[0].id + 0.5, 'amount': 3}],
+            [{'id': True, 'amount': 3}],
+            [{'id': self.ingredients[0].id, 'amount': 2.5}],
+        ):
+            with self.subTest(ingredients=ingredients):
+                response = self.patch(ingredients)
+                self.assertEqual(response.status_code, 400)
+
+    def test_invalid_tags(self):
+        ingredients = [{'id': self.ingredients[0].id, 'amount': 3}]
+        for tags in (
+            [],
+            5,
+            'abc',
+            {'id': 1},
+            [{'a': 1}],
+            [[1]],
+            ['x'],
+            [True],
+            [1.5],
+            [0],
+        ):
+            with self.subTest(tags=tags):
+                response = self.patch(ingredients, tags)
+                self.assertEqual(response.status_code, 400)
+
+    def test_update_ingredients(self):
+        first, second = self.ingredients[:2]
+        response = self.patch(
+            [
+                {'id': str(first.id), 'amount': '7'},
+                {'id': second.id, 'amount': 2},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(
+                self.recipes[0].recipe_ingredients.values_list(
+                    'ingredient_id', 'amount'
+                )
+            ),
+            {first.id: 7, second.id: 2},
+        )
+
+
+class ResponseCacheTest(APITestBase):
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_key_includes_host_and_scheme(self):
+        for host, secure, prefix in (
+            ('localhost:8000', False, 'http://localhost:8000/'),
+            ('foodgram.example.com', False, 'http://foodgram.example.com/'),
+            ('foodgram.example.com', True, 'https://foodgram.example.com/'),
+        ):
+            with self.subTest(host=host, secure=secure):
+                response = self.client.get(
+                    '/api/recipes/?limit=1', HTTP_HOST=host, secure=secure
+                )
+                self.assertTrue(response.data['next'].startswith(prefix))
+
+    def test_cached_until_recipes_change(self):
+        url = '/api/recipes/?limit=1'
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.create(
+                author=self.author, name='Новый', text='Текст', cooking_time=1
+            )
+        response = self.client.get(url)
+        self.assertEqual(response.data['results'][0]['name'], 'Новый')
+
+
+class CursorPaginationTest(APITestBase):
+    def test_walk_pages(self):
+        self.client.force_authenticate(self.user)
+        url = '/api/recipes/?cursor=&limit=3&count=exact'
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], self.recipes_count)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(
+            ids, [recipe.id for recipe in reversed(self.recipes)]
+        )
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            ids[3:6],
+        )
+
+    def test_malformed_cursor(self):
+        self.client.force_authenticate(self.user)
+        for url, cursor in (
+            ('/api/recipes/', 'not base64!'),
+            ('/api/recipes/', encode_cursor([1, 2])),
+            ('/api/recipes/', encode_cursor({'p': [1]})),
+            ('/api/recipes/', encode_cursor({'p': ['garbage', 5]})),
+            ('/api/recipes/', encode_cursor({'p': [{'a': 1}, 'x']})),
+            ('/api/recipes/', encode_cursor({'p': [None, 1]})),
+            ('/api/users/', encode_cursor({'p': ['abc']})),
+            ('/api/users/subscriptions/', encode_cursor({'p': [[1]]})),
+        ):
+            with self.subTest(url=url, cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class ConditionalRequestTest(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def assert_not_modified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_recipe_not_modified_until_changed(self):
+        url = f'/api/recipes/{self.recipes[0].id}/'
+        etag = self.client.get(url)['ETag']
+        # на 304 рецепт целиком не загружается
+        with self.assertNumQueries(2):
+            self.assert_not_modified(url, etag)
+
+        tag = self.recipes[0].tags.get()
+        tag.name = 'Новое название'
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tags'][0]['name'], 'Новое название')
+
+    def test_recipe_etag_changes_with_ingredients(self):
+        recipe = self.recipes[0]
+        url = f'/api/recipes/{recipe.id}/'
+        self.client.force_authenticate(self.author)
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(
+            url,
+            {
+                'tags': [self.tags[0].id],
+                'ingredients': [{'id': self.ingredients[4].id, 'amount': 9}],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['ingredients'][0]['amount'], 9)
+
+    def test_invalid_recipe_id(self):
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': '"etag"'},
+            {'HTTP_IF_MODIFIED_SINCE': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+        ):
+            for pk in ('abc', '0'):
+                with self.subTest(headers=headers, pk=pk):
+                    response = self.client.get(
+                        f'/api/recipes/{pk}/', **headers
+                    )
+                    self.assertEqual(response.status_code, 404)
+
+    def test_list_etag_depends_on_user_flags(self):
+        url = '/api/recipes/?limit=3'
+        etag = self.client.get(url)['ETag']
+        self.assert_not_modified(url, etag)
+
+        Favorites.objects.create(user=self.user, recipe=self.recipes[-1])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['is_favorited'])
+
+        self.client.force_authenticate(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class FavoriteAndCartTest(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_duplicates_rejected(self):
+        for url in (
+            f'/api/recipes/{self.recipes[0].id}/favorite/',
+            f'/api/recipes/{self.recipes[1].id}/shopping_cart/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url).status_code, 400)
+
+
+class PopularityCountersTest(APITestBase):
+    def counters(self, recipe):
+        recipe.refresh_from_db()
+        return recipe.favorites_count, recipe.in_carts_count
+
+    def test_actions_update_counters(self):
+        recipe = self.recipes[3]
+        self.client.force_authenticate(self.user)
+        self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+        self.client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.assertEqual(self.counters(recipe), (1, 1))
+
+        self.client.delete(f'/api/recipes/{recipe.id}/favorite/')
+        self.client.delete(f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.assertEqual(self.counters(recipe), (0, 0))
+
+    def test_reconcile_and_popular_ordering(self):
+        # избранное и покупки из setUpTestData созданы в обход счётчиков
+        Recipe.objects.filter(pk=self.recipes[2].pk).update(favorites_count=5)
+        self.assertEqual(Recipe.objects.reconcile_counters(), 3)
+        self.assertEqual(self.counters(self.recipes[0]), (1, 0))
+        self.assertEqual(self.counters(self.recipes[1]), (0, 1))
+        self.assertEqual(self.counters(self.recipes[2]), (0, 0))
+
+        response = self.client.get('/api/recipes/?ordering=popular&limit=1')
+        self.assertEqual(response.data['results'][0]['id'], self.recipes[0].id)
+
+
+class TagRegistryTest(APITestBase):
+    def test_tags_served_without_queries(self):
+        self.client.get('/api/tags/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/tags/')
+        self.assertEqual(
+            [tag['slug'] for tag in response.data],
+            [tag.slug for tag in self.tags],
+        )
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/tags/', HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(f'/api/tags/{self.tags[1].id}/')
+        self.assertEqual(response.data['slug'], self.tags[1].slug)
+        self.assertEqual(self.client.get('/api/tags/0/').status_code, 404)
+
+    def test_etag_changes_with_tags(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Новый', slug='new', color='#00FF00')
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[-1]['slug'], 'new')
+
+    def test_recipe_filter(self):
+        url = '/api/recipes/?limit=10'
+        self.client.get(f'{url}&tags=tag0')
+        # slug переводятся в id по реестру, без запроса к тегам
+        with self.assertNumQueries(4):
+            response = self.client.get(f'{url}&tags=tag1&tags=tag2')
+        self.assertEqual(
+            {recipe['id'] for recipe in response.data['results']},
+            {recipe.id for recipe in self.recipes if recipe.tags.count() > 1},
+        )
+        response = self.client.get(f'{url}&tags=unknown')
+        self.assertEqual(response.status_code, 400)
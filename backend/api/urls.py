@@ -1,9 +1,9 @@
 from django.urls import include, path
-from rest_framework import routers
 
+from .routers import Router
 from .views import IngredientViewSet, RecipeViewSet, TagViewSet
 
-router = routers.DefaultRouter()
+router = Router()
 router.register("tags", TagViewSet)
 router.register("ingredients", IngredientViewSet)
 router.register("recipes", RecipeViewSet)
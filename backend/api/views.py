@@ -1,5 +1,6 @@
+from django.db import transaction
 from django.db.models import Sum
-from django.http import HttpResponse
+from django.http import Http404, StreamingHttpResponse
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -12,6 +13,9 @@ from rest_framework.permissions import (
 )
 from rest_framework.response import Response
 
+from foodgram.metrics import OPERATIONS
+from recipes.catalogue import ingredient_catalogue, tag_registry
+from recipes.const import INGREDIENTS, RECIPES
 from recipes.models import (
     Favorites,
     Ingredient,
@@ -20,7 +24,15 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from users.serializers import UserSerializer
 
+from .cache import (
+    CachedResponseMixin,
+    conditional_response,
+    is_conditional,
+    make_etag,
+)
+from .exporters import RENDERERS, IgnoreFormatNegotiation
 from .filters import IngredientFilter, RecipeFilter
 from .pagination import CustomPagination
 from .serializers import (
@@ -37,25 +49,182 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
     permission_classes = (AllowAny,)
+    async_reads = True
+
+    # чтение обслуживаем из реестра тегов в памяти, без запросов к БД
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(tag_registry.all(), many=True)
+        return conditional_response(
+            request, Response(serializer.data), tag_registry.etag
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        tag = tag_registry.get(self.kwargs['pk'])
+        if tag is None:
+            raise Http404
+        serializer = self.get_serializer(tag)
+        return conditional_response(
+            request,
+            Response(serializer.data),
+            make_etag(tuple(serializer.data.items())),
+        )
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (filters.DjangoFilterBackend,)
     pagination_class = None
     filterset_class = IngredientFilter
     permission_classes = (AllowAny,)
+    # список и так отдаётся из справочника в памяти,
+    # в общий кэш идут только отдельные ингредиенты
+    cache_versions = (INGREDIENTS,)
+    async_reads = True
 
+    def list(self, request, *args, **kwargs):
+        # автодополнение обслуживаем из справочника в памяти,
+        # остальные фильтры идут через БД
+        if request.query_params.keys() - {'name'}:
+            return super().list(request, *args, **kwargs)
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_catalogue.search(name))
+        return Response(ingredient_catalogue.all())
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     pagination_class = CustomPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    cache_versions = (RECIPES,)
+    # is_favorited и is_in_shopping_cart анонимам ничего не фильтруют
+    cache_params = (
+        'page',
+        'limit',
+        'tags',
+        'author',
+        'is_favorited',
+        'is_in_shopping_cart',
+        'cursor',
+        'count',
+        'ordering',
+    )
+    # популярность меняется без сброса версии рецептов,
+    # поэтому такие ответы живут в кэше недолго
+    popular_cache_timeout = 5 * 60
+    async_reads = True
 
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    etag_fields = (
+        'id',
+        'updated_at',
+        'author_id',
+        'is_favorited',
+        'is_in_shopping_cart',
+    )
+
+    def get_cache_timeout(self):
+        if self.request.query_params.get('ordering') == 'popular':
+            return self.popular_cache_timeout
+        return super().get_cache_timeout()
+
+    def get_queryset(self):
+        queryset = Recipe.objects.with_user_flags(self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_related()
+        return queryset
+
+    def get_etag(self, recipes):
+        # в ответе есть флаги пользователя и подписка на автора,
+        # поэтому ETag у каждого пользователя свой
+        subscribed_ids = UserSerializer.get_subscribed_ids(self.request)
+        paginator = self.paginator
+        page = getattr(paginator, 'page', None)
+        return make_etag(
+            self.request.user.id,
+            page.paginator.count if page is not None else None,
+            # при пагинации по курсору
+            getattr(paginator, 'cursor_count', None),
+            getattr(paginator, 'has_next', None),
+            [
+                tuple(getattr(recipe, field) for field in self.etag_fields)
+                + (recipe.author_id in subscribed_ids,)
+                for recipe in recipes
+            ],
+        )
+
+    def check_not_modified(self, recipes):
+        if not recipes:
+            return None
+        response = conditional_response(
+            self.request, Response(), self.get_etag(recipes)
+        )
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            return response
+        return None
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_anonymous:
+            return super().list(request, *args, **kwargs)
+        if is_conditional(request):
+            # ETag считаем по лёгкому запросу, чтобы на 304
+            # не загружать и не сериализовать рецепты целиком
+            queryset = self.filter_queryset(
+                Recipe.objects.with_user_flags(request.user).only(
+                    # и поля, по которым строится курсор
+                    'updated_at',
+                    'author',
+                    'pub_date',
+                    'favorites_count',
+                )
+            )
+            rows = self.paginate_queryset(queryset)
+            response = self.check_not_modified(
+                list(queryset) if rows is None else rows
+            )
+            if response is not None:
+                return response
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        recipes = list(queryset) if page is None else page
+        serializer = self.get_serializer(recipes, many=True)
+        if page is None:
+            response = Response(serializer.data)
+        else:
+            response = self.get_paginated_response(serializer.data)
+        return conditional_response(
+            request, response, self.get_etag(recipes)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_anonymous:
+            return super().retrieve(request, *args, **kwargs)
+        if is_conditional(request):
+            # get_object() отвечает 404 на нечисловой id, а filter(pk=...)
+            # падал бы с ValueError
+            try:
+                pk = int(kwargs['pk'])
+            except ValueError:
+                raise Http404
+            response = self.check_not_modified(
+                Recipe.objects.with_user_flags(request.user)
+                .filter(pk=pk)
+                .only('updated_at', 'author')
+            )
+            if response is not None:
+                return response
+
+        recipe = self.get_object()
+        serializer = self.get_serializer(recipe)
+        return conditional_response(
+            request,
+            Response(serializer.data),
+            self.get_etag([recipe]),
+        )
 
     def perform_create(self, serializer):
         return serializer.save(author=self.request.user)
@@ -79,7 +248,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
+            Recipe.objects.filter(pk=recipe.pk).increment('favorites_count')
+        OPERATIONS.labels('RecipeViewSet.favorite', 'add').inc()
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -88,7 +260,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
         user = request.user
         recipe = get_object_or_404(Recipe, id=pk)
         favorites = get_object_or_404(Favorites, user=user, recipe=recipe)
-        favorites.delete()
+        with transaction.atomic():
+            favorites.delete()
+            Recipe.objects.filter(pk=recipe.pk).increment(
+                'favorites_count', -1
+            )
+        OPERATIONS.labels('RecipeViewSet.favorite', 'remove').inc()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -110,7 +287,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
             data=data, context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
+            Recipe.objects.filter(pk=recipe.pk).increment('in_carts_count')
+        OPERATIONS.labels('RecipeViewSet.shopping_cart', 'add').inc()
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -119,27 +299,48 @@ class RecipeViewSet(viewsets.ModelViewSet):
         user = request.user
         recipe = get_object_or_404(Recipe, id=pk)
         favorites = get_object_or_404(ShoppingCart, user=user, recipe=recipe)
-        favorites.delete()
+        with transaction.atomic():
+            favorites.delete()
+            Recipe.objects.filter(pk=recipe.pk).increment(
+                'in_carts_count', -1
+            )
+        OPERATIONS.labels('RecipeViewSet.shopping_cart', 'remove').inc()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, permission_classes=[IsAuthenticated])
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        content_negotiation_class=IgnoreFormatNegotiation,
+    )
     def download_shopping_cart(self, request):
+        export_format = request.query_params.get('format', 'txt')
+        if export_format not in RENDERERS:
+            return Response(
+                {
+                    'format': 'Доступные форматы: '
+                    + ', '.join(sorted(RENDERERS))
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        renderer = RENDERERS[export_format]()
         ingredients = (
-            RecipeIngredient.objects.select_related('recipes')
-            .filter(recipe__customers__user=request.user)
+            RecipeIngredient.objects.filter(
+                recipe__customers__user=request.user
+            )
             .values('ingredient__name', 'ingredient__measurement_unit')
             .annotate(amount=Sum('amount'))
+            .order_by('ingredient__name')
             .values_list(
                 'ingredient__name', 'ingredient__measurement_unit', 'amount'
             )
         )
-        shopping_list = []
-        for name, measurement_unit, amount in ingredients:
-            shopping_list.append(
-                f'{name} - {amount} ' f'{measurement_unit} \n'
-            )
-        response = HttpResponse(shopping_list, 'Content-Type: text/plain')
-        response['Content-Disposition'] = 'attachment; filename="shoplist.txt"'
+        response = StreamingHttpResponse(
+            renderer.render(ingredients.iterator()),
+            content_type=renderer.media_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{renderer.get_filename()}"'
+        )
 
         return response
@@ -0,0 +1,23 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'foodgram:version:{}'
+
+
+def get_version(namespace):
+    """Текущая версия данных namespace, общая для всех процессов.
+
+    Версия — время последнего изменения в наносекундах: процессы
+    сравнивают её со своей и перечитывают локальные кэши при расхождении.
+    """
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    cache.set(VERSION_KEY.format(namespace), time.time_ns(), timeout=None)
@@ -0,0 +1,47 @@
+from django.conf import settings
+
+
+class HealthCheckMixin:
+    """Проверка постоянного соединения перед первым запросом к БД.
+
+    Без проверки первый запрос после перезапуска PostgreSQL или обрыва
+    соединения по таймауту падает с ошибкой. Django 3.2 сам так не умеет
+    (CONN_HEALTH_CHECKS появился в 4.1), поэтому повторяем его поведение:
+    close_old_connections() на request_started и request_finished
+    сбрасывает флаг, а SELECT 1 выполняется только перед первым запросом
+    к БД. Запросы, которые обходятся без БД (теги, справочник
+    ингредиентов, кэш ответов), проверку не оплачивают.
+    """
+
+    health_check_done = False
+
+    def connect(self):
+        # новое соединение проверять незачем; флаг ставим до connect(),
+        # который сам вызывает set_autocommit()
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or self.health_check_done
+            or self.in_atomic_block
+            or not settings.DB_HEALTH_CHECKS
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def set_autocommit(self, *args, **kwargs):
+        # atomic() начинает транзакцию здесь, до первого курсора
+        self.close_if_health_check_failed()
+        return super().set_autocommit(*args, **kwargs)
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,146 @@
+"""PostgreSQL с пулом соединений внутри процесса (экспериментально).
+
+Подключается через ENGINE = 'foodgram.db_pool' (DB_POOL=true).
+Django по-прежнему закрывает соединение в конце запроса, но закрытие
+возвращает его в пул, а следующий запрос берёт готовое соединение
+без TCP/TLS-рукопожатия и авторизации. Полезно для тредовых и
+async-воркеров, где соединений на процесс несколько.
+"""
+import threading
+
+import psycopg2.extras
+from django.conf import settings
+from django.db.backends.postgresql import base, creation
+from psycopg2 import OperationalError, extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """Пул, который при исчерпании ждёт соединение, а не падает сразу.
+
+    minconn — сколько свободных соединений пул держит открытыми,
+    остальные возвращённые соединения закрываются.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, *args, **kwargs):
+        self._semaphore = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        if not self._semaphore.acquire(timeout=self._timeout):
+            raise PoolError('Нет свободных соединений с БД')
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+    def putconn(self, conn, key=None, close=False):
+        if id(conn) not in self._rused:
+            raise PoolError('Соединение выдано не этим пулом')
+        try:
+            super().putconn(conn, key, close)
+        except Exception:
+            # например, rollback на оборванном соединении: закрываем его,
+            # чтобы место в пуле не потерялось
+            if id(conn) in self._rused and not self.closed:
+                super().putconn(conn, key, close=True)
+            raise
+        finally:
+            # место освобождается, только если пул действительно
+            # забрал соединение
+            if id(conn) not in self._rused:
+                self._semaphore.release()
+
+
+def get_pool(alias, conn_params):
+    # у одного alias бывают разные параметры: Django подключается
+    # к базе postgres, чтобы создать или удалить тестовую базу
+    key = (alias, tuple(sorted(conn_params.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = BlockingConnectionPool(
+                settings.DB_POOL_MIN_SIZE,
+                settings.DB_POOL_MAX_SIZE,
+                settings.DB_POOL_TIMEOUT,
+                **conn_params,
+            )
+        return _pools[key]
+
+
+def close_pools(alias=None):
+    """Закрывает пулы (все или одного alias), например перед fork."""
+    with _pools_lock:
+        for key in list(_pools):
+            if alias is None or key[0] == alias:
+                _pools.pop(key).closeall()
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except OperationalError:
+        return False
+    return True
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # свободные соединения пула не дали бы удалить тестовую базу
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, conn_params)
+        connection = self.checkout()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def checkout(self):
+        # соединение могло оборваться, пока лежало в пуле (перезапуск
+        # PostgreSQL, таймаут): такие закрываем и берём следующее
+        for _ in range(settings.DB_POOL_MAX_SIZE):
+            connection = self.pool.getconn()
+            if not settings.DB_HEALTH_CHECKS or (
+                not connection.closed and is_usable(connection)
+            ):
+                return connection
+            self.pool.putconn(connection, close=True)
+        # все свободные соединения были мёртвыми, новое пул создаст сам
+        return self.pool.getconn()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        # сломанное соединение или незавершённую транзакцию
+        # в пул не возвращаем
+        broken = (
+            connection.closed
+            or self.errors_occurred
+            or connection.get_transaction_status()
+            != extensions.TRANSACTION_STATUS_IDLE
+        )
+        with self.wrap_database_errors:
+            self.pool.putconn(connection, close=broken)
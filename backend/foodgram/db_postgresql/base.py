@@ -0,0 +1,11 @@
+"""PostgreSQL с проверкой постоянных соединений (см. foodgram.db).
+
+Подключается через ENGINE = 'foodgram.db_postgresql'.
+"""
+from django.db.backends.postgresql import base
+
+from foodgram.db import HealthCheckMixin
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+    pass
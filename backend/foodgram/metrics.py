@@ -0,0 +1,106 @@
+import hmac
+import os
+import resource
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# При запуске под gunicorn переменная PROMETHEUS_MULTIPROC_DIR включает
+# multiprocess-режим: каждый воркер пишет значения в свои mmap-файлы,
+# а /metrics суммирует файлы всех воркеров.
+
+REQUESTS = Counter(
+    'foodgram_requests_total',
+    'Число HTTP-запросов',
+    ('view', 'method', 'status'),
+)
+REQUEST_LATENCY = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки HTTP-запроса',
+    ('view',),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'foodgram_request_queries',
+    'Число SQL-запросов на HTTP-запрос',
+    ('view',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Обращения к кэшам приложения',
+    ('cache', 'result'),
+)
+OPERATIONS = Counter(
+    'foodgram_operations_total',
+    'Добавления и удаления избранного, покупок и подписок',
+    ('view', 'operation'),
+)
+
+# время запуска: process=master — загрузка приложения и прогрев кэшей,
+# process=worker — от fork до готовности воркера
+STARTUP_SECONDS = Gauge(
+    'foodgram_startup_seconds',
+    'Время запуска процесса gunicorn',
+    ('process',),
+    multiprocess_mode='max',
+)
+WORKER_MEMORY = Gauge(
+    'foodgram_worker_memory_bytes',
+    'Память воркера после запуска: rss — вся, private — не общая с мастером',
+    ('kind',),
+    multiprocess_mode='liveall',
+)
+
+
+def cache_hit(cache_name, hit):
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+def process_memory():
+    """RSS процесса и его приватная часть (без страниц, общих после fork)."""
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            values = {
+                name: int(value.split()[0]) * 1024
+                for name, value in (line.split(':', 1) for line in smaps)
+                if name in ('Rss', 'Private_Clean', 'Private_Dirty')
+            }
+    except (OSError, ValueError):
+        # не Linux: только пиковый RSS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {'rss': rss, 'private': rss}
+    return {
+        'rss': values['Rss'],
+        'private': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def metrics_view(request):
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    expected = f'Bearer {settings.METRICS_TOKEN}'
+    if not hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(), expected.encode()
+    ):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
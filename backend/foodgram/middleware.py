@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import REQUEST_LATENCY, REQUEST_QUERIES, REQUESTS
+
+logger = logging.getLogger('foodgram.timing')
+
+
+def get_view_name(request):
+    """Имя view для логов и метрик, например RecipeViewSet.favorite."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None) or getattr(
+        match.func, 'view_class', None
+    )
+    if view_class is None:
+        return match.view_name or match.func.__name__
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def add_execute_wrapper(request, wrapper):
+    """Подключает execute_wrapper к SQL, выполняемому в потоке view.
+
+    В ASGI-режиме async view выполняют SQL в потоках пула, а не в потоке
+    middleware, поэтому обёртку подключает api.async_views.run_view.
+    Синхронные view в ASGI-режиме так не учитываются.
+    """
+    request._execute_wrappers = [
+        *getattr(request, '_execute_wrappers', ()),
+        wrapper,
+    ]
+
+
+class AsyncCapableMiddleware:
+    """Middleware, которое работает и в WSGI, и в ASGI-режиме.
+
+    Синхронное middleware в цепочке заставило бы Django обрабатывать
+    каждый запрос в отдельном потоке и свело бы async view на нет.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # так же помечает себя django.utils.deprecation.MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryRecorder:
+    """execute_wrapper: считает запросы, их время и одинаковый SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            # параметры передаются отдельно, поэтому sql — это «форма»
+            # запроса: одинаковый sql с разными id и есть N+1
+            self.shapes[sql] += 1
+
+
+class RequestTimingMiddleware(AsyncCapableMiddleware):
+    """Замеряет время запроса по фазам для доли запросов.
+
+    Фазы: db — время SQL, serialize — остальное время во view (в DRF
+    это в основном сериализация), render — рендеринг ответа. Результат
+    уходит в заголовок Server-Timing и в лог foodgram.timing.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        self.duplicate_threshold = settings.REQUEST_TIMING_DUPLICATE_QUERIES
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._timing = {'recorder': recorder}
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._timing = {'recorder': recorder}
+        add_execute_wrapper(request, recorder)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        finished = time.perf_counter()
+        timing = request._timing
+        view_started = timing.get('view_started', started)
+        render_started = timing.get('render_started', finished)
+        view_db = timing.get('render_db', recorder.duration) - timing.get(
+            'view_db', 0.0
+        )
+        phases = {
+            'db': recorder.duration,
+            'serialize': max(render_started - view_started - view_db, 0.0),
+            'render': finished - render_started,
+            'total': finished - started,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1000:.1f}'
+            + (f';desc="{recorder.count} queries"' if name == 'db' else '')
+            for name, duration in phases.items()
+        )
+        self.log(request, response, recorder, phases)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, '_timing', None)
+        if timing is not None:
+            timing['view_started'] = time.perf_counter()
+            timing['view_db'] = timing['recorder'].duration
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, '_timing', None)
+        if timing is not None:
+            timing['render_started'] = time.perf_counter()
+            timing['render_db'] = timing['recorder'].duration
+        return response
+
+    def log(self, request, response, recorder, phases):
+        view = get_view_name(request)
+        logger.info(
+            json.dumps(
+                {
+                    'view': view,
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'queries': recorder.count,
+                    **{
+                        f'{name}_ms': round(duration * 1000, 1)
+                        for name, duration in phases.items()
+                    },
+                },
+                ensure_ascii=False,
+            )
+        )
+        for sql, count in recorder.shapes.items():
+            if count >= self.duplicate_threshold:
+                logger.warning(
+                    json.dumps(
+                        {
+                            'view': view,
+                            'duplicate_queries': count,
+                            'sql': sql[:500],
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Счётчики и гистограммы Prometheus по каждому view и action."""
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        return self.observe(request, response, counter, started)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        add_execute_wrapper(request, counter)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.observe(request, response, counter, started)
+
+    def observe(self, request, response, counter, started):
+        view = get_view_name(request)
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        REQUEST_LATENCY.labels(view).observe(time.perf_counter() - started)
+        REQUEST_QUERIES.labels(view).observe(counter.count)
+        return response
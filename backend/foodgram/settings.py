@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -16,6 +17,7 @@ ALLOWED_HOSTS = ['foood.ddns.net', '127.0.0.1', 'localhost']
 
 INSTALLED_APPS = [
     'api',
+    'jobs',
     'recipes',
     'users',
     'django.contrib.admin',
@@ -32,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.MetricsMiddleware',
+    'foodgram.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,14 +65,53 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+# SERVER_MODE=asgi — uvicorn-воркеры gunicorn и async view для
+# горячих эндпоинтов чтения (api.async_views), иначе обычный WSGI
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+ASYNC_VIEWS = SERVER_MODE == 'asgi'
+
+# DB_POOL=true — экспериментальный пул соединений внутри процесса
+# (foodgram.db_pool), иначе постоянные соединения на DB_CONN_MAX_AGE
+# секунд. DB_POOL_MIN_SIZE — сколько свободных соединений держит пул
+DB_POOL = os.getenv('DB_POOL', 'false').lower() == 'true'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+# перед первым запросом к БД в рамках запроса проверять, живо ли
+# постоянное соединение (foodgram.db.HealthCheckMixin)
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', 'true').lower() == 'true'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'foodgram.db_pool'
+            if DB_POOL
+            else 'foodgram.db_postgresql'
+        ),
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', 5432),
+        # с пулом соединение возвращается в пул в конце каждого запроса
+        'CONN_MAX_AGE': (
+            0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60))
+        ),
+    }
+}
+
+# кэш должен быть общим для всех воркеров gunicorn:
+# через него процессы узнают об изменении справочников
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'foodgram_cache'),
+        ),
     }
 }
 
@@ -111,7 +154,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -132,3 +175,34 @@ DJOSER = {
 }
 
 AUTH_USER_MODEL = 'users.CustomUser'
+
+# кэш токенов авторизации (users.authentication)
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 5 * 60))
+
+JOBS_BACKEND = os.getenv('JOBS_BACKEND', 'jobs.backends.ThreadBackend')
+JOBS_THREADS = int(os.getenv('JOBS_THREADS', 2))
+
+# доля запросов, для которых считаются Server-Timing и лог по фазам
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', 0.01)
+)
+# столько одинаковых SQL-запросов за запрос считаем признаком N+1
+REQUEST_TIMING_DUPLICATE_QUERIES = int(
+    os.getenv('REQUEST_TIMING_DUPLICATE_QUERIES', 5)
+)
+
+# /metrics отвечает только на запросы с заголовком
+# Authorization: Bearer <METRICS_TOKEN>; без токена эндпоинт выключен
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'foodgram': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -0,0 +1,137 @@
+from unittest import mock, skipIf, skipUnless
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .db import HealthCheckMixin
+
+
+class MetricsViewTest(SimpleTestCase):
+    @override_settings(METRICS_TOKEN='')
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requires_token(self):
+        for headers in (
+            {},
+            {'HTTP_AUTHORIZATION': 'Bearer wrong'},
+            {'HTTP_AUTHORIZATION': 'secret'},
+        ):
+            with self.subTest(headers=headers):
+                response = self.client.get('/metrics', **headers)
+                self.assertEqual(response.status_code, 401)
+
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'foodgram_requests_total', response.content)
+
+
+@skipIf(settings.DB_POOL, 'с пулом соединение проверяется при выдаче')
+@override_settings(DB_HEALTH_CHECKS=True)
+class HealthCheckTest(TestCase):
+    def setUp(self):
+        wrapper_class = type(connections[DEFAULT_DB_ALIAS])
+        if not issubclass(wrapper_class, HealthCheckMixin):
+            wrapper_class = type(
+                'DatabaseWrapper', (HealthCheckMixin, wrapper_class), {}
+            )
+        self.wrapper = wrapper_class(
+            {**connection.settings_dict, 'CONN_MAX_AGE': None},
+            alias='health_check_test',
+        )
+        self.wrapper.ensure_connection()
+        self.addCleanup(self.wrapper.close)
+
+    def query(self):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_checked_once_before_first_query(self):
+        with mock.patch.object(
+            self.wrapper, 'is_usable', return_value=True
+        ) as is_usable:
+            # как close_old_connections() на request_started
+            self.wrapper.close_if_unusable_or_obsolete()
+            self.assertFalse(is_usable.called)
+            self.query()
+            self.query()
+            self.assertEqual(is_usable.call_count, 1)
+            # запрос без обращений к БД проверку не оплачивает
+            self.wrapper.close_if_unusable_or_obsolete()
+            self.wrapper.close_if_unusable_or_obsolete()
+            self.assertEqual(is_usable.call_count, 1)
+
+    def test_dead_connection_replaced(self):
+        for run in (self.query, self.begin):
+            with self.subTest(run=run.__name__):
+                self.wrapper.close_if_unusable_or_obsolete()
+                with mock.patch.object(
+                    self.wrapper, 'is_usable', return_value=False
+                ), mock.patch.object(
+                    self.wrapper, 'close', wraps=self.wrapper.close
+                ) as close:
+                    run()
+                close.assert_called_once_with()
+
+    def begin(self):
+        # так начинает транзакцию atomic()
+        self.wrapper.set_autocommit(False)
+        self.wrapper.rollback()
+        self.wrapper.set_autocommit(True)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+class ConnectionPoolTest(TestCase):
+    def test_checkout_and_return(self):
+        import psycopg2
+        from psycopg2.pool import PoolError
+
+        from foodgram.db_pool.base import BlockingConnectionPool
+
+        params = connection.get_connection_params()
+        pool = BlockingConnectionPool(1, 2, 0.1, **params)
+        foreign = psycopg2.connect(**params)
+        try:
+            first, second = pool.getconn(), pool.getconn()
+            with self.assertRaises(PoolError):
+                pool.getconn()
+            pool.putconn(first)
+            # свободное соединение берётся повторно
+            self.assertIs(pool.getconn(), first)
+            # чужое соединение не освобождает место в пуле
+            with self.assertRaises(PoolError):
+                pool.putconn(foreign)
+            with self.assertRaises(PoolError):
+                pool.getconn()
+            pool.putconn(second, close=True)
+            self.assertFalse(pool.getconn().closed)
+        finally:
+            foreign.close()
+            pool.closeall()
+
+    @override_settings(DB_HEALTH_CHECKS=True)
+    def test_dead_connection_replaced_on_checkout(self):
+        from foodgram.db_pool.base import DatabaseWrapper, close_pools
+
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, 'ENGINE': 'foodgram.db_pool'},
+            alias='pool_test',
+        )
+        try:
+            wrapper.ensure_connection()
+            pid = wrapper.connection.get_backend_pid()
+            wrapper.close()
+            # как после перезапуска PostgreSQL
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s, 5000)', [pid])
+            wrapper.ensure_connection()
+            self.assertNotEqual(wrapper.connection.get_backend_pid(), pid)
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        finally:
+            wrapper.close()
+            close_pools('pool_test')
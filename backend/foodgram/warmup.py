@@ -0,0 +1,32 @@
+from django.core.cache import caches
+from django.db import connections
+
+from recipes.catalogue import ingredient_catalogue, tag_registry
+
+
+def close_connections():
+    """Закрывает соединения мастера, чтобы воркеры их не унаследовали."""
+    connections.close_all()
+    if any(
+        connection.settings_dict['ENGINE'] == 'foodgram.db_pool'
+        for connection in connections.all()
+    ):
+        from foodgram.db_pool.base import close_pools
+
+        close_pools()
+    for cache in caches.all():
+        cache.close()
+
+
+def warm_up():
+    """Прогревает кэши до того, как воркеры начнут принимать запросы.
+
+    При preload_app вызывается в мастере gunicorn: прогретый справочник
+    ингредиентов достаётся воркерам через fork, в том числе воркерам,
+    перезапущенным по max_requests.
+    """
+    try:
+        ingredient_catalogue.all()
+        tag_registry.all()
+    finally:
+        close_connections()
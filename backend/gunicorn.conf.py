@@ -0,0 +1,101 @@
+import os
+import shutil
+import time
+
+from prometheus_client import multiprocess
+
+# конфиг читается первым, от этого момента считаем время запуска мастера
+STARTED = time.monotonic()
+
+
+def get_cores():
+    # в контейнере процесс может быть ограничен частью ядер хоста
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+cores = get_cores()
+bind = '0.0.0.0:8000'
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# SERVER_MODE=asgi: uvicorn-воркеры и async view (settings.ASYNC_VIEWS)
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    default_workers = cores
+elif threads > 1:
+    wsgi_app = 'foodgram.wsgi:application'
+    worker_class = 'gthread'
+    default_workers = cores
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+    worker_class = 'sync'
+    # синхронный воркер простаивает, пока ждёт БД
+    default_workers = 2 * cores + 1
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers))
+
+# приложение загружается в мастере один раз, воркеры получают его
+# через fork и делят память copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# перезапуск воркера через max_requests ограничивает рост памяти,
+# а разброс не даёт всем воркерам перезапуститься одновременно
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(
+    os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+)
+
+
+def on_starting(server):
+    # файлы метрик от прошлого запуска исказили бы суммы в /metrics
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def when_ready(server):
+    if preload_app:
+        from foodgram.metrics import STARTUP_SECONDS
+        from foodgram.warmup import warm_up
+
+        warm_up()
+        elapsed = time.monotonic() - STARTED
+        STARTUP_SECONDS.labels('master').set(elapsed)
+        server.log.info(
+            'Приложение загружено и прогрето за %.2f с: %s x %s',
+            elapsed,
+            workers,
+            worker_class,
+        )
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    from foodgram.metrics import STARTUP_SECONDS, WORKER_MEMORY, process_memory
+
+    if not preload_app:
+        from foodgram.warmup import warm_up
+
+        warm_up()
+    elapsed = time.monotonic() - worker.forked_at
+    memory = process_memory()
+    STARTUP_SECONDS.labels('worker').set(elapsed)
+    for kind, value in memory.items():
+        WORKER_MEMORY.labels(kind).set(value)
+    worker.log.info(
+        'Воркер %s готов за %.2f с, RSS %.1f МБ, из них своих %.1f МБ',
+        worker.pid,
+        elapsed,
+        memory['rss'] / 2 ** 20,
+        memory['private'] / 2 ** 20,
+    )
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
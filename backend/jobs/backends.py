@@ -0,0 +1,50 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Job
+from .queue import run_task
+
+logger = logging.getLogger(__name__)
+
+
+class BaseBackend:
+    def enqueue(self, name, kwargs):
+        raise NotImplementedError
+
+
+class ImmediateBackend(BaseBackend):
+    """Выполняет задачу сразу, в том же потоке (тесты, отладка)."""
+
+    def enqueue(self, name, kwargs):
+        run_task(name, kwargs)
+
+
+class ThreadBackend(BaseBackend):
+    """Очередь в памяти процесса: задачи выполняет пул потоков."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.JOBS_THREADS, thread_name_prefix='jobs'
+        )
+
+    def enqueue(self, name, kwargs):
+        self.executor.submit(self.run, name, kwargs)
+
+    @staticmethod
+    def run(name, kwargs):
+        try:
+            run_task(name, kwargs)
+        except Exception:
+            logger.exception('Задача %s завершилась ошибкой', name)
+        finally:
+            connections.close_all()
+
+
+class DatabaseBackend(BaseBackend):
+    """Очередь в таблице Job, её разбирает команда run_jobs."""
+
+    def enqueue(self, name, kwargs):
+        Job.objects.create(task=name, kwargs=kwargs)
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.models import Job
+from jobs.queue import run_task
+
+
+class Command(BaseCommand):
+    help = 'Выполняем задачи из очереди DatabaseBackend'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться',
+        )
+        parser.add_argument('--sleep', type=float, default=1.0)
+        parser.add_argument('--max-attempts', type=int, default=3)
+
+    def handle(self, *args, **options):
+        while True:
+            job = self.take_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+            self.run_job(job, options['max_attempts'])
+
+    @staticmethod
+    @transaction.atomic
+    def take_job():
+        # skip_locked позволяет запускать несколько воркеров параллельно
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDING)
+            .first()
+        )
+        if job is not None:
+            job.status = Job.Status.RUNNING
+            job.attempts += 1
+            job.save(update_fields=('status', 'attempts', 'updated'))
+        return job
+
+    def run_job(self, job, max_attempts):
+        try:
+            run_task(job.task, job.kwargs)
+        except Exception as error:
+            job.error = repr(error)
+            job.status = (
+                Job.Status.FAILED
+                if job.attempts >= max_attempts
+                else Job.Status.PENDING
+            )
+            self.stdout.write(
+                self.style.ERROR(f'Ошибка в задаче {job}: {job.error}')
+            )
+        else:
+            job.status = Job.Status.DONE
+            job.error = ''
+        job.save(update_fields=('status', 'error', 'updated'))
@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+TASKS = {}
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу.
+
+    Аргументы задачи передаются только именованными и должны
+    сериализоваться в JSON: DatabaseBackend хранит их в таблице Job.
+    """
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    TASKS[func.task_name] = func
+    return func
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.JOBS_BACKEND)()
+
+
+def enqueue(func, **kwargs):
+    # задача не должна увидеть данные незавершённой транзакции
+    transaction.on_commit(
+        lambda: get_backend().enqueue(func.task_name, kwargs)
+    )
+
+
+def run_task(name, kwargs):
+    TASKS[name](**kwargs)
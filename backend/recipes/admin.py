@@ -17,14 +17,11 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'favorite')
+    list_display = ('name', 'author', 'favorites_count', 'in_carts_count')
+    readonly_fields = ('favorites_count', 'in_carts_count')
     inlines = (RecipeIngredientInline,)
     list_filter = ('name', 'tags', 'author')
 
-    def favorite(self, obj):
-        counter = Favorites.objects.filter(recipe=obj).count()
-        return counter
-
 
 admin.site.register(Tag)
 admin.site.register(ShoppingCart)
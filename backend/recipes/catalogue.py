@@ -0,0 +1,150 @@
+import hashlib
+import threading
+from bisect import bisect_left
+from typing import NamedTuple
+
+from foodgram.cache import get_version
+from foodgram.metrics import cache_hit
+
+from .const import INGREDIENTS, MIN_SEARCH_SUBSTRING_LENGTH, TAGS
+from .models import Ingredient, Tag
+
+
+class IngredientSnapshot(NamedTuple):
+    version: int
+    items: list
+    names: list
+
+
+class IngredientCatalogue:
+    """Справочник ингредиентов в памяти процесса для автодополнения.
+
+    Строки отсортированы по названию в нижнем регистре, поиск по началу
+    названия — бинарный. Справочник перечитывается из БД, когда меняется
+    версия INGREDIENTS в общем кэше (см. recipes.signals).
+
+    Данные публикуются одним присваиванием неизменяемого снимка, поэтому
+    читатели в других потоках не видят смесь старых и новых списков.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _load(self):
+        version = get_version(INGREDIENTS)
+        snapshot = self._snapshot
+        hit = snapshot is not None and snapshot.version == version
+        cache_hit(INGREDIENTS, hit)
+        if hit:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            items = sorted(
+                Ingredient.objects.values('id', 'name', 'measurement_unit'),
+                key=lambda item: (item['name'].lower(), item['id']),
+            )
+            snapshot = IngredientSnapshot(
+                version, items, [item['name'].lower() for item in items]
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    def all(self):
+        return self._load().items
+
+    def search(self, query):
+        _, items, names = self._load()
+        query = query.lower()
+        start = bisect_left(names, query)
+        end = bisect_left(names, query + '\uffff', start)
+        result = items[start:end]
+        if len(query) >= MIN_SEARCH_SUBSTRING_LENGTH:
+            result += [
+                item
+                for index, item in enumerate(items)
+                if query in names[index] and not start <= index < end
+            ]
+        return result
+
+
+class TagSnapshot(NamedTuple):
+    version: int
+    tags: list
+    by_id: dict
+    by_slug: dict
+    etag: str
+
+
+class TagRegistry:
+    """Теги в памяти процесса: соответствие id, slug и объекта.
+
+    Тегов мало, и меняются они редко, поэтому список тегов и фильтр
+    рецептов по тегам обходятся без запросов к БД. Реестр перечитывается,
+    когда меняется версия TAGS в общем кэше (см. recipes.signals).
+    Как и IngredientCatalogue, публикует данные одним снимком.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _load(self):
+        version = get_version(TAGS)
+        snapshot = self._snapshot
+        hit = snapshot is not None and snapshot.version == version
+        cache_hit(TAGS, hit)
+        if hit:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            tags = list(Tag.objects.order_by('id'))
+            # сильный ETag: зависит только от содержимого тегов
+            etag = '"{}"'.format(
+                hashlib.md5(
+                    repr(
+                        [(t.id, t.name, t.color, t.slug) for t in tags]
+                    ).encode()
+                ).hexdigest()
+            )
+            snapshot = TagSnapshot(
+                version,
+                tags,
+                {tag.id: tag for tag in tags},
+                {tag.slug: tag for tag in tags},
+                etag,
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    def all(self):
+        return self._load().tags
+
+    def get(self, pk):
+        by_id = self._load().by_id
+        try:
+            return by_id.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def get_by_slug(self, slug):
+        return self._load().by_slug.get(slug)
+
+    def ids(self, slugs):
+        by_slug = self._load().by_slug
+        return [by_slug[slug].id for slug in slugs if slug in by_slug]
+
+    def choices(self):
+        return [(tag.slug, tag.name) for tag in self._load().tags]
+
+    @property
+    def etag(self):
+        return self._load().etag
+
+
+ingredient_catalogue = IngredientCatalogue()
+tag_registry = TagRegistry()
@@ -1,4 +1,10 @@
-NAME_LENGTH = 200
-COLOR_LENGTH = 7
-SLUG_LENGTH = 200
-MEASUREMENT_LENGTH = 200
+NAME_LENGTH = 200
+COLOR_LENGTH = 7
+SLUG_LENGTH = 200
+MEASUREMENT_LENGTH = 200
+MIN_SEARCH_SUBSTRING_LENGTH = 3
+
+# версии данных в общем кэше (см. foodgram.cache)
+INGREDIENTS = 'ingredients'
+RECIPES = 'recipes'
+TAGS = 'tags'
@@ -0,0 +1,82 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# защита от «бомб» распаковки: больше не декодируем
+MAX_IMAGE_PIXELS = 40_000_000
+
+# имя варианта -> (поле модели Recipe, максимальные ширина и высота)
+RENDITIONS = {
+    'full': ('image', (1920, 1920)),
+    'medium': ('image_medium', (800, 800)),
+    'thumbnail': ('image_thumbnail', (320, 320)),
+}
+
+if features.check('webp'):
+    IMAGE_FORMAT, IMAGE_EXTENSION = 'WEBP', 'webp'
+else:
+    IMAGE_FORMAT, IMAGE_EXTENSION = 'JPEG', 'jpg'
+IMAGE_QUALITY = 80
+
+
+def check_image_size(image):
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ValueError(
+            f'Изображение слишком большое: {width}x{height} пикселей.'
+        )
+
+
+def check_image_file(image_file):
+    # Image.open читает только заголовок, пиксели не декодируются
+    image_file.seek(0)
+    check_image_size(Image.open(image_file))
+    image_file.seek(0)
+
+
+def open_image(image_file):
+    image_file.seek(0)
+    image = Image.open(image_file)
+    check_image_size(image)
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    if IMAGE_FORMAT == 'JPEG' or not has_alpha:
+        return image.convert('RGB')
+    return image.convert('RGBA')
+
+
+def make_renditions(image_file):
+    """Декодирует картинку один раз и возвращает набор её вариантов.
+
+    Результат: {поле модели: ContentFile}; имя файла строится из хэша
+    содержимого, поэтому одинаковые картинки не дублируются в storage.
+    """
+    image = open_image(image_file)
+    renditions = {}
+    # варианты идут от большего к меньшему: каждый следующий
+    # масштабируется из предыдущего, а не из оригинала
+    for name, (field_name, size) in RENDITIONS.items():
+        image = image.copy()
+        image.thumbnail(size, Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, IMAGE_FORMAT, quality=IMAGE_QUALITY)
+        content = buffer.getvalue()
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        renditions[field_name] = ContentFile(
+            content, name=f'{digest}_{name}.{IMAGE_EXTENSION}'
+        )
+    return renditions
+
+
+def save_renditions(recipe, renditions):
+    for field_name, content in renditions.items():
+        field_file = getattr(recipe, field_name)
+        path = field_file.field.generate_filename(recipe, content.name)
+        if field_file.storage.exists(path):
+            field_file.name = path
+        else:
+            field_file.save(content.name, content, save=False)
@@ -0,0 +1,214 @@
+import os
+import random
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from dotenv import load_dotenv
+
+from foodgram.cache import bump_version
+from recipes.const import RECIPES
+from recipes.models import (
+    Favorites,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+    User,
+)
+from users.models import Subscribe
+
+load_dotenv()
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Создание набора данных для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument(
+            '--favorites',
+            type=int,
+            default=10,
+            help='Избранных рецептов на пользователя (в среднем)',
+        )
+        parser.add_argument(
+            '--carts',
+            type=int,
+            default=5,
+            help='Рецептов в списке покупок на пользователя (в среднем)',
+        )
+        parser.add_argument(
+            '--subscriptions',
+            type=int,
+            default=5,
+            help='Подписок на пользователя (в среднем)',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix',
+            default='load',
+            help='Префикс имён создаваемых пользователей',
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        started = time.monotonic()
+
+        ingredient_ids = list(
+            Ingredient.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        if not ingredient_ids:
+            raise CommandError(
+                'Нет ингредиентов: сначала выполните import_ingredients'
+            )
+        tag_ids = self.get_tag_ids()
+
+        user_ids = self.create_users(
+            options['users'], f'{options["prefix"]}{options["seed"]}_'
+        )
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, ingredient_ids, tag_ids
+        )
+        for model, per_user in (
+            (Favorites, options['favorites']),
+            (ShoppingCart, options['carts']),
+        ):
+            self.bulk_insert(
+                model,
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id, recipe_id in self.pairs(
+                        user_ids, recipe_ids, per_user
+                    )
+                ),
+            )
+        self.bulk_insert(
+            Subscribe,
+            (
+                Subscribe(user_id=user_id, subscribing_id=author_id)
+                for user_id, author_id in self.pairs(
+                    user_ids, user_ids, options['subscriptions']
+                )
+                if user_id != author_id
+            ),
+        )
+
+        Recipe.objects.reconcile_counters()
+        # bulk_create не вызывает сигналы, кэш ответов сбрасываем сами
+        bump_version(RECIPES)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Успех! Пользователей: {len(user_ids)}, '
+                f'рецептов: {len(recipe_ids)}, '
+                f'время: {time.monotonic() - started:.1f} с'
+            )
+        )
+
+    def get_tag_ids(self):
+        if not Tag.objects.exists():
+            for name, color, slug in DEFAULT_TAGS:
+                Tag.objects.create(name=name, color=color, slug=slug)
+        return list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_users(self, count, prefix):
+        # пароль у всех одинаковый: хэшируем его один раз
+        password = make_password(os.getenv('DEFAULT_USER_PASSWORD'))
+        self.bulk_insert(
+            User,
+            (
+                User(
+                    username=f'{prefix}{number}',
+                    email=f'{prefix}{number}@example.com',
+                    first_name='Имя',
+                    last_name=f'Фамилия {number}',
+                    password=password,
+                )
+                for number in range(count)
+            ),
+        )
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def create_recipes(self, count, user_ids, ingredient_ids, tag_ids):
+        recipe_ids = []
+        TagRelation = Recipe.tags.through
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            with transaction.atomic():
+                last_id = Recipe.objects.aggregate(Max('pk'))['pk__max'] or 0
+                Recipe.objects.bulk_create(
+                    Recipe(
+                        author_id=self.random.choice(user_ids),
+                        name=f'Рецепт {offset + number}',
+                        text='Описание рецепта для нагрузочного теста.',
+                        cooking_time=self.random.randint(1, 180),
+                    )
+                    for number in range(size)
+                )
+                # bulk_create возвращает id не во всех СУБД,
+                # поэтому читаем id только что созданных рецептов
+                batch_ids = list(
+                    Recipe.objects.filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .values_list('pk', flat=True)
+                )
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=self.random.randint(1, 500),
+                    )
+                    for recipe_id in batch_ids
+                    for ingredient_id in self.random.sample(
+                        ingredient_ids,
+                        min(len(ingredient_ids), self.random.randint(3, 10)),
+                    )
+                )
+                TagRelation.objects.bulk_create(
+                    TagRelation(recipe_id=recipe_id, tag_id=tag_id)
+                    for recipe_id in batch_ids
+                    for tag_id in self.random.sample(
+                        tag_ids, self.random.randint(1, len(tag_ids))
+                    )
+                )
+            recipe_ids += batch_ids
+            if self.verbosity > 1:
+                self.stdout.write(f'Создано рецептов: {len(recipe_ids)}')
+        return recipe_ids
+
+    def pairs(self, user_ids, target_ids, per_user):
+        if not target_ids or not per_user:
+            return
+        for user_id in user_ids:
+            count = min(
+                len(target_ids), self.random.randint(0, 2 * per_user)
+            )
+            for target_id in self.random.sample(target_ids, count):
+                yield user_id, target_id
+
+    def bulk_insert(self, model, objects):
+        # повторный запуск не падает на уже существующих связях
+        objects = iter(objects)
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                return
+            model.objects.bulk_create(batch, ignore_conflicts=True)
@@ -1,41 +1,104 @@
 import csv
+import json
 import os
+import re
+import time
+from itertools import islice
 
 from django.core.management.base import BaseCommand, CommandError
 
+from foodgram.cache import bump_version
+from recipes.const import INGREDIENTS
 from recipes.models import Ingredient
 
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row:
+            yield row[0], row[1]
+
+
+def read_json(file, chunk_size=1 << 16):
+    # файл разбирается по одному объекту массива,
+    # целиком в память не загружается
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size)
+    position = SEPARATORS.match(buffer).end()
+    if buffer[position:position + 1] != '[':
+        raise CommandError('Ожидался JSON-массив ингредиентов')
+    position += 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer[position:position + 1] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise CommandError('Некорректный JSON-файл')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item['name'], item['measurement_unit']
+
+
+READERS = {'csv': read_csv, 'json': read_json}
+
 
 class Command(BaseCommand):
-    help = 'Импортируем данные из CSV в БД'
+    help = 'Импортируем ингредиенты из CSV или JSON в БД'
 
     def add_arguments(self, parser):
-        parser.add_argument('csv_file', type=str)
+        parser.add_argument('file', type=str)
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='По умолчанию определяется по расширению файла',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
 
     def handle(self, *args, **options):
-        csv_file_path = options['csv_file']
-
-        if not os.path.exists(csv_file_path):
-            raise CommandError(f'не найден файл: {csv_file_path}')
-
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                name = row[0]
-                measurement_unit = row[1]
-
-                ingredient, created = Ingredient.objects.get_or_create(
-                    name=name, measurement_unit=measurement_unit
-                )
-                if created:
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Успех! Импортирован ингредиент: {ingredient}'
-                        )
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Ингредиент уже существует: {ingredient}'
-                        )
+        file_path = options['file']
+
+        if not os.path.exists(file_path):
+            raise CommandError(f'не найден файл: {file_path}')
+        file_format = options['format'] or (
+            os.path.splitext(file_path)[1].lstrip('.').lower()
+        )
+        if file_format not in READERS:
+            raise CommandError(f'неизвестный формат файла: {file_path}')
+
+        started = time.monotonic()
+        count_before = Ingredient.objects.count()
+        processed = 0
+        with open(file_path, 'r', encoding='utf-8') as file:
+            rows = READERS[file_format](file)
+            while True:
+                batch = [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in islice(
+                        rows, options['batch_size']
                     )
+                ]
+                if not batch:
+                    break
+                # уже существующие ингредиенты пропускаются
+                # по ограничению unique_ingtidient
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                processed += len(batch)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Обработано строк: {processed}')
+
+        # bulk_create не вызывает сигналы, справочник сбрасываем сами
+        bump_version(INGREDIENTS)
+        created = Ingredient.objects.count() - count_before
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Успех! Обработано строк: {processed}, '
+                f'добавлено ингредиентов: {created}, '
+                f'пропущено существующих: {processed - created}, '
+                f'время: {time.monotonic() - started:.1f} с'
+            )
+        )
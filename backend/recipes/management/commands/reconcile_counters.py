@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.cache import bump_version
+from recipes.const import RECIPES
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяем счётчики избранного и списков покупок у рецептов '
+        'с таблицами связей и исправляем расхождения'
+    )
+
+    def handle(self, *args, **options):
+        fixed = Recipe.objects.reconcile_counters()
+        if fixed:
+            # порядок ?ordering=popular мог измениться
+            bump_version(RECIPES)
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено рецептов: {fixed}')
+        )
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from recipes.models import ImageStatus, Recipe
+from recipes.tasks import process_recipe_image
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново ставим в очередь обработку картинок рецептов, '
+        'которые слишком долго остаются в статусе pending'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=10,
+            help='Сколько минут рецепт не менялся (по умолчанию 10)',
+        )
+
+    def handle(self, *args, **options):
+        # задачи ThreadBackend живут только в памяти воркера и теряются
+        # при его перезапуске, а рецепт так и остаётся в pending
+        stale = Recipe.objects.filter(
+            image_status=ImageStatus.PENDING,
+            updated_at__lt=timezone.now()
+            - timedelta(minutes=options['older_than']),
+        ).values_list('pk', flat=True)
+        count = 0
+        for recipe_id in stale.iterator():
+            enqueue(process_recipe_image, recipe_id=recipe_id)
+            count += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Поставлено в очередь рецептов: {count}')
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-18 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'В обработке'), ('ready', 'Готово'), ('failed', 'Ошибка')], default='ready', max_length=20, verbose_name='Обработка изображения'),
+        ),
+    ]
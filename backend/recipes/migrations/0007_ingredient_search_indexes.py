@@ -0,0 +1,41 @@
+from django.db import migrations
+
+POSTGRESQL_INDEXES = (
+    # поиск по началу названия: lower(name) LIKE 'запрос%'
+    'CREATE INDEX ingredient_name_prefix_idx '
+    'ON recipes_ingredient (lower(name) text_pattern_ops)',
+    # поиск по подстроке: lower(name) LIKE '%запрос%'
+    'CREATE INDEX ingredient_name_trgm_idx '
+    'ON recipes_ingredient USING gin (lower(name) gin_trgm_ops)',
+)
+FALLBACK_INDEXES = (
+    'CREATE INDEX ingredient_name_prefix_idx '
+    'ON recipes_ingredient (lower(name))',
+)
+INDEX_NAMES = ('ingredient_name_prefix_idx', 'ingredient_name_trgm_idx')
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        statements = POSTGRESQL_INDEXES
+    else:
+        statements = FALLBACK_INDEXES
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_indexes(apps, schema_editor):
+    for name in INDEX_NAMES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_image_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
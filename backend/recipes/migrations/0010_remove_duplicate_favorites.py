@@ -0,0 +1,29 @@
+# Generated by Django 3.2.3 on 2026-10-18 05:35
+
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    # перед уникальным ограничением оставляем по одной записи на пару
+    for model_name in ('Favorites', 'ShoppingCart'):
+        model = apps.get_model('recipes', model_name)
+        duplicates = (
+            model.objects.values('user', 'recipe')
+            .annotate(keep=models.Min('id'), total=models.Count('id'))
+            .filter(total__gt=1)
+        )
+        for row in duplicates:
+            model.objects.filter(
+                user=row['user'], recipe=row['recipe']
+            ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
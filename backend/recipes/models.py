@@ -1,9 +1,16 @@
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.functions import Coalesce, Greatest, Lower
+from django.utils import timezone
 from rest_framework.fields import MinValueValidator
 
-from .const import MEASUREMENT_LENGTH, NAME_LENGTH, SLUG_LENGTH
+from .const import (
+    MEASUREMENT_LENGTH,
+    MIN_SEARCH_SUBSTRING_LENGTH,
+    NAME_LENGTH,
+    SLUG_LENGTH,
+)
 
 User = get_user_model()
 
@@ -21,12 +28,107 @@ class Tag(models.Model):
         return self.name
 
 
+class ImageStatus(models.TextChoices):
+    PENDING = 'pending', 'В обработке'
+    READY = 'ready', 'Готово'
+    FAILED = 'failed', 'Ошибка'
+
+
+class RecipeQuerySet(models.QuerySet):
+    def touch(self):
+        return self.update(updated_at=timezone.now())
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            models.Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(
+                Favorites.objects.filter(
+                    user=user, recipe=models.OuterRef('pk')
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                ShoppingCart.objects.filter(
+                    user=user, recipe=models.OuterRef('pk')
+                )
+            ),
+        )
+
+    def increment(self, field, delta=1):
+        # атомарно в БД, без гонок между параллельными запросами
+        return self.update(
+            **{field: Greatest(models.F(field) + delta, models.Value(0))}
+        )
+
+    def reconcile_counters(self):
+        """Пересчитывает счётчики, разошедшиеся с таблицами связей."""
+        counters = {
+            'favorites_count': Favorites,
+            'in_carts_count': ShoppingCart,
+        }
+        actual = {
+            field: Coalesce(
+                models.Subquery(
+                    model.objects.filter(recipe=models.OuterRef('pk'))
+                    .order_by()
+                    .values('recipe')
+                    .annotate(total=models.Count('pk'))
+                    .values('total')
+                ),
+                models.Value(0),
+            )
+            for field, model in counters.items()
+        }
+        mismatched = (
+            self.annotate(
+                **{f'actual_{field}': value for field, value in actual.items()}
+            )
+            .exclude(
+                **{field: models.F(f'actual_{field}') for field in actual}
+            )
+            .values_list('pk', flat=True)
+        )
+        return self.model.objects.filter(pk__in=list(mismatched)).update(
+            **actual
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=NAME_LENGTH)
     image = models.ImageField(
         upload_to='recipes/images/', null=True, default=None
     )
+    image_medium = models.ImageField(
+        upload_to='recipes/images/', blank=True, default=''
+    )
+    image_thumbnail = models.ImageField(
+        upload_to='recipes/images/', blank=True, default=''
+    )
+    image_status = models.CharField(
+        max_length=20,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        verbose_name='Обработка изображения',
+    )
     text = models.TextField()
     ingredients = models.ManyToManyField(
         'Ingredient',
@@ -45,20 +147,83 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата изменения'
+    )
+    # счётчики обновляются в действиях favorite и shopping_cart,
+    # расхождения исправляет команда reconcile_counters
+    favorites_count = models.PositiveIntegerField(
+        default=0, verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, verbose_name='В списках покупок'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецпты'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            # лента рецептов и пагинация по курсору
+            models.Index(
+                fields=('-pub_date', '-id'), name='recipe_pub_date_id_idx'
+            ),
+            # фильтр ?author= и последние рецепты авторов в подписках
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx',
+            ),
+            # ?ordering=popular
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_popular_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def preview(self):
+        return self.image_medium or self.image
+
+    @property
+    def thumbnail(self):
+        return self.image_thumbnail or self.image
+
+
+class IngredientQuerySet(models.QuerySet):
+    def search(self, query):
+        query = query.lower()
+        queryset = self.annotate(lower_name=Lower('name'))
+        # короче триграммы индекс pg_trgm не помогает,
+        # поэтому для 1-2 символов ищем только по началу названия
+        if len(query) < MIN_SEARCH_SUBSTRING_LENGTH:
+            return queryset.filter(lower_name__startswith=query)
+        return (
+            queryset.filter(lower_name__contains=query)
+            .annotate(
+                is_substring=models.Case(
+                    models.When(
+                        lower_name__startswith=query,
+                        then=models.Value(False),
+                    ),
+                    default=models.Value(True),
+                    output_field=models.BooleanField(),
+                )
+            )
+            .order_by('is_substring', 'name')
+        )
+
 
 class Ingredient(models.Model):
     name = models.CharField(max_length=NAME_LENGTH)
     measurement_unit = models.CharField(max_length=MEASUREMENT_LENGTH)
 
+    objects = IngredientQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
@@ -116,6 +281,11 @@ class Favorites(models.Model):
     class Meta:
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_favorite'
+            )
+        ]
 
     def __str__(self):
         return f'{self.recipe} в избранном у {self.user}'
@@ -136,6 +306,11 @@ class ShoppingCart(models.Model):
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Покупки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_shopping_cart'
+            )
+        ]
 
     def __str__(self):
         return (
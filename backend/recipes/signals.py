@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from foodgram.cache import bump_version
+
+from .const import INGREDIENTS, RECIPES, TAGS
+from .models import Ingredient, Recipe, Tag, User
+
+
+def bump_on_commit(*namespaces):
+    # версию меняем после коммита, иначе другой процесс может
+    # перечитать ещё старые данные и запомнить их с новой версией
+    def bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+
+    transaction.on_commit(bump)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    bump_on_commit(INGREDIENTS, RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    bump_on_commit(TAGS, RECIPES)
+
+
+# на RecipeIngredient сигналов нет: строки меняются только вместе с
+# рецептом (сериализатор и админка сохраняют сам рецепт), а обработчик
+# на каждую строку мешал бы Django удалять их одним запросом
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_recipes(**kwargs):
+    bump_on_commit(RECIPES)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(action, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit(RECIPES)
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_authors(update_fields=None, **kwargs):
+    # при входе по токену обновляется только last_login,
+    # данные автора в рецептах от этого не меняются
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_on_commit(RECIPES)
+
+
+# updated_at рецепта входит в его ETag, поэтому меняем его при любом
+# изменении данных, которые попадают в ответ с рецептом
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipe_tags(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif pk_set:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    else:
+        recipes = Recipe.objects.filter(tags=instance)
+    recipes.touch()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tag_recipes(instance, **kwargs):
+    Recipe.objects.filter(tags=instance).touch()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def touch_ingredient_recipes(instance, **kwargs):
+    Recipe.objects.filter(ingredients=instance).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    Recipe.objects.filter(author=instance).touch()
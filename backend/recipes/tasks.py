@@ -0,0 +1,44 @@
+import logging
+
+from django.utils import timezone
+
+from foodgram.cache import bump_version
+from jobs.queue import task
+
+from .const import RECIPES
+from .images import make_renditions, save_renditions
+from .models import ImageStatus, Recipe
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def process_recipe_image(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return
+    original = recipe.image.name
+    try:
+        with recipe.image.open('rb') as image_file:
+            renditions = make_renditions(image_file)
+    except (OSError, ValueError):
+        logger.exception('Не удалось обработать картинку рецепта %s', recipe)
+        Recipe.objects.filter(pk=recipe_id, image=original).update(
+            image_status=ImageStatus.FAILED
+        )
+        return
+    save_renditions(recipe, renditions)
+    # пока шла обработка, картинку рецепта могли заменить:
+    # тогда результат устарел и его не сохраняем
+    updated = Recipe.objects.filter(pk=recipe_id, image=original).update(
+        image=recipe.image.name,
+        image_medium=recipe.image_medium.name,
+        image_thumbnail=recipe.image_thumbnail.name,
+        image_status=ImageStatus.READY,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        # update() не вызывает сигналы, кэш ответов сбрасываем сами
+        bump_version(RECIPES)
+        if original != recipe.image.name:
+            recipe.image.storage.delete(original)
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import ImageStatus, Ingredient, Recipe, RecipeIngredient, User
+from .tasks import process_recipe_image
+
+
+def create_author():
+    return User.objects.create_user(
+        email='author@example.com',
+        username='author',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password-123',
+    )
+
+
+class RequeueImagesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_author()
+        cls.stale, cls.fresh, cls.ready = [
+            Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {i}',
+                text='Текст',
+                cooking_time=1,
+                image_status=status,
+            )
+            for i, status in enumerate(
+                (ImageStatus.PENDING, ImageStatus.PENDING, ImageStatus.READY)
+            )
+        ]
+        Recipe.objects.exclude(pk=cls.fresh.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+    @mock.patch('recipes.management.commands.requeue_images.enqueue')
+    def test_requeues_stale_pending_recipes(self, enqueue):
+        call_command('requeue_images', stdout=StringIO())
+        enqueue.assert_called_once_with(
+            process_recipe_image, recipe_id=self.stale.pk
+        )
+
+    @mock.patch('recipes.management.commands.requeue_images.enqueue')
+    def test_older_than(self, enqueue):
+        call_command('requeue_images', older_than=0, stdout=StringIO())
+        self.assertCountEqual(
+            [call.kwargs['recipe_id'] for call in enqueue.call_args_list],
+            [self.stale.pk, self.fresh.pk],
+        )
+
+
+class RecipeIngredientSignalsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {i}', measurement_unit='г'
+            )
+            for i in range(5)
+        ]
+        cls.recipe = Recipe.objects.create(
+            author=create_author(), name='Рецепт', text='Текст', cooking_time=1
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=cls.recipe, ingredient=ingredient, amount=1
+            )
+            for ingredient in cls.ingredients
+        )
+
+    def test_recipe_delete_does_not_touch_rows(self):
+        with CaptureQueriesContext(connection) as context:
+            self.recipe.delete()
+        updates = [
+            query['sql']
+            for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(updates, [])
+        self.assertFalse(RecipeIngredient.objects.exists())
+
+    def test_ingredient_delete_touches_recipe(self):
+        Recipe.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.ingredients[0].delete()
+        self.recipe.refresh_from_db()
+        self.assertGreater(
+            self.recipe.updated_at, timezone.now() - timedelta(minutes=1)
+        )
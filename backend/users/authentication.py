@@ -0,0 +1,161 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram.cache import bump_version, get_version
+from foodgram.metrics import cache_hit
+
+TOKENS = 'tokens'
+TOKEN_KEY = 'foodgram:token:{}'
+# поля пользователя, которые кладём в кэш; остальные (пароль, даты)
+# отложены и загружаются из БД при первом обращении
+USER_FIELDS = (
+    'id',
+    'email',
+    'username',
+    'first_name',
+    'last_name',
+    'is_active',
+    'is_staff',
+    'is_admin',
+    'is_superuser',
+)
+
+
+def get_token_hash(key):
+    # сам токен в общий кэш не кладём
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_cache_key(key):
+    return TOKEN_KEY.format(get_token_hash(key))
+
+
+def get_token_namespace(key):
+    return f'{TOKENS}:{get_token_hash(key)}'
+
+
+def get_token_version(key):
+    return get_version(get_token_namespace(key))
+
+
+def dump_user(user):
+    return tuple(getattr(user, field) for field in USER_FIELDS)
+
+
+def load_user(values):
+    User = get_user_model()
+    fields = dict(zip(USER_FIELDS, values))
+    names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in fields
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, names, [fields[name] for name in names]
+    )
+
+
+class TokenCache:
+    """Кэш token -> пользователь: LRU в памяти процесса поверх общего кэша.
+
+    Кэшируются только поля USER_FIELDS, без хэша пароля. Записи и в LRU,
+    и в общем кэше хранят версию токена, с которой они созданы, и
+    действительны, пока версия не сменилась (и не истёк TTL). Версию
+    меняет invalidate(), поэтому выход, смена пароля или блокировка
+    пользователя видны всем процессам сразу, а записи других токенов
+    остаются в кэше.
+
+    invalidate() вызывают сигналы post_save/post_delete (users.signals).
+    QuerySet.update() сигналов не отправляет: после массового изменения
+    пользователей, например update(is_active=False), нужно вызвать
+    revoke_user_tokens().
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key, version):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                values, item_version, expires = item
+                if item_version == version and expires > time.monotonic():
+                    self._items.move_to_end(key)
+                    return load_user(values)
+                del self._items[key]
+        item = cache.get(get_cache_key(key))
+        if item is None:
+            return None
+        values, item_version = item
+        if item_version != version:
+            return None
+        self._store(key, values, version)
+        return load_user(values)
+
+    def set(self, key, user, version):
+        # version прочитана до запроса к БД. Если токен успели отозвать,
+        # версия уже сменилась: не пишем, а запись, проскочившую между
+        # проверкой и set, отбросит get() по несовпадению версии
+        if get_token_version(key) != version:
+            return
+        values = dump_user(user)
+        cache.set(get_cache_key(key), (values, version), self.timeout)
+        self._store(key, values, version)
+
+    def _store(self, key, values, version):
+        with self._lock:
+            self._items[key] = (
+                values,
+                version,
+                time.monotonic() + self.timeout,
+            )
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, keys):
+        cache.delete_many([get_cache_key(key) for key in keys])
+        for key in keys:
+            bump_version(get_token_namespace(key))
+
+
+token_cache = TokenCache(
+    settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TIMEOUT
+)
+
+
+def revoke_user_tokens(users):
+    """Сбрасывает кэш токенов пользователей после коммита транзакции."""
+    keys = list(
+        Token.objects.filter(user__in=users).values_list('key', flat=True)
+    )
+    if keys:
+        transaction.on_commit(lambda: token_cache.invalidate(keys))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к БД на каждый запрос."""
+
+    def authenticate_credentials(self, key):
+        version = get_token_version(key)
+        user = token_cache.get(key, version)
+        cache_hit(TOKENS, user is not None)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, version)
+        else:
+            # каждый раз новый объект, запросы его не делят
+            token = Token(key=key, user=user)
+        return user, token
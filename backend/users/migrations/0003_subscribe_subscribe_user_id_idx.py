@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-18 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20230916_2218'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscribe',
+            index=models.Index(fields=['user', '-id'], name='subscribe_user_id_idx'),
+        ),
+    ]
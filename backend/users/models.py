@@ -88,6 +88,12 @@ class Subscribe(models.Model):
                 fields=["user", "subscribing"], name="unique_subscribe"
             ),
         ]
+        indexes = [
+            # подписки пользователя с пагинацией по курсору
+            models.Index(
+                fields=("user", "-id"), name="subscribe_user_id_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         # выводим кто на кого подписан
@@ -37,12 +37,26 @@ class UserSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return Subscribe.objects.filter(
-            user=request.user, subscribing=obj.id
-        ).exists()
+        return obj.id in self.get_subscribed_ids(request)
+
+    @staticmethod
+    def get_subscribed_ids(request):
+        # один запрос на весь запрос: вложенные сериализаторы
+        # авторов берут id подписок из кэша на объекте request
+        subscribed_ids = getattr(request, '_subscribed_ids', None)
+        if subscribed_ids is None:
+            subscribed_ids = set(
+                Subscribe.objects.filter(user=request.user).values_list(
+                    'subscribing_id', flat=True
+                )
+            )
+            request._subscribed_ids = subscribed_ids
+        return subscribed_ids
 
 
 class SubscribeResipeSerializer(serializers.ModelSerializer):
+    image = serializers.ImageField(source='thumbnail', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -70,7 +84,17 @@ class SubscribeSerializer(UserSerializer):
             'recipes_count',
         )
 
+    def get_is_subscribed(self, obj):
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous:
+            return False
+        return obj.subscribing_id in self.get_subscribed_ids(request)
+
     def get_recipes(self, obj):
+        recipes = getattr(obj.subscribing, 'recent_recipes', None)
+        if recipes is not None:
+            return SubscribeResipeSerializer(recipes, many=True).data
+
         limit = self.context.get('request').query_params.get('recipes_limit')
 
         if limit:
@@ -84,6 +108,8 @@ class SubscribeSerializer(UserSerializer):
         return SubscribeResipeSerializer(queryset, many=True).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return Recipe.objects.filter(author=obj.subscribing).count()
 
 
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import revoke_user_tokens, token_cache
+from .models import CustomUser
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(instance, **kwargs):
+    # выход через djoser удаляет токен; после удаления Django обнуляет
+    # первичный ключ (key) у объекта, поэтому запоминаем его сейчас
+    key = instance.key
+    transaction.on_commit(lambda: token_cache.invalidate([key]))
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_tokens(instance, update_fields=None, **kwargs):
+    # смена пароля (ChangePasswordView), is_active и данные профиля;
+    # last_login в кэшированном пользователе не важен
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    revoke_user_tokens([instance])
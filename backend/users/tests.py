@@ -0,0 +1,133 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .authentication import (
+    dump_user,
+    get_cache_key,
+    get_token_version,
+    revoke_user_tokens,
+    token_cache,
+)
+from .models import CustomUser
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+}
+
+
+@override_settings(CACHES=TEST_CACHES, REQUEST_TIMING_SAMPLE_RATE=0)
+class CachedTokenAuthenticationTest(APITestCase):
+    password = 'password-123'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='user@example.com',
+            username='user',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=cls.password,
+        )
+
+    def setUp(self):
+        cache.clear()
+        token_cache._items.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.key = self.token.key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def get_me(self):
+        return self.client.get('/api/users/me/')
+
+    def test_cached_after_first_request(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        with self.assertNumQueries(0):
+            token_cache.get(self.key, get_token_version(self.key))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_me().status_code, 200)
+
+    def test_logout(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_password_change(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        for current, new in (
+            (self.password, 'new-password-1'),
+            # пользователь из кэша уже с новым паролем
+            ('new-password-1', 'new-password-2'),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    '/api/users/set_password/',
+                    {'current_password': current, 'new_password': new},
+                )
+            self.assertEqual(response.status_code, 200)
+
+    def test_deactivation(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_bulk_deactivation(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        users = CustomUser.objects.filter(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            users.update(is_active=False)
+            revoke_user_tokens(users)
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_stale_set_after_revoke(self):
+        # запрос прочитал версию и пользователя до выхода,
+        # а записал их в кэш уже после
+        version = get_token_version(self.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        token_cache.set(self.key, self.user, version)
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_stale_shared_entry(self):
+        stale_version = get_token_version(self.key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        # запись со старой версией, записанная в общий кэш после выхода
+        cache.set(
+            get_cache_key(self.key), (dump_user(self.user), stale_version)
+        )
+        self.assertIsNone(
+            token_cache.get(self.key, get_token_version(self.key))
+        )
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_other_logout_keeps_entry(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        other = CustomUser.objects.create_user(
+            email='other@example.com',
+            username='other',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=self.password,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.create(user=other).delete()
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(
+                token_cache.get(self.key, get_token_version(self.key))
+            )
+
+    def test_shared_entry_has_no_password(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        values, _ = cache.get(get_cache_key(self.key))
+        self.assertNotIn(self.user.password, values)
+        user = token_cache.get(self.key, get_token_version(self.key))
+        self.assertEqual(user.email, self.user.email)
+        # пароль отложен и читается из БД только при обращении
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password(self.password))
@@ -1,5 +1,6 @@
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+
+from api.routers import Router
 
 from .views import (
     ChangePasswordView,
@@ -8,7 +9,7 @@ from .views import (
     SubscribeListViewSet,
 )
 
-router = DefaultRouter()
+router = Router()
 
 router.register(
     'users/subscriptions', SubscribeListViewSet, basename='subscribe'
@@ -1,3 +1,4 @@
+from django.db.models import Count, OuterRef, Prefetch, Subquery
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import (
@@ -10,9 +11,12 @@ from rest_framework import (
 )
 from rest_framework.authentication import get_user_model
 from rest_framework.decorators import action
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 
+from api.pagination import SubscribePagination, UserPagination
+from foodgram.metrics import OPERATIONS
+from recipes.models import Recipe
+
 from .models import Subscribe
 from .serializers import (
     ChangePasswordSerializer,
@@ -36,7 +40,7 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = UserPagination
 
     @action(
         detail=True,
@@ -56,6 +60,7 @@ class CustomUserViewSet(UserViewSet):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        OPERATIONS.labels('CustomUserViewSet.subscribe', 'add').inc()
 
         return Response(
             serializer.data,
@@ -70,6 +75,7 @@ class CustomUserViewSet(UserViewSet):
             Subscribe, user=user, subscribing=subscribing
         )
         subscribe.delete()
+        OPERATIONS.labels('CustomUserViewSet.subscribe', 'remove').inc()
 
         return Response(
             status=status.HTTP_204_NO_CONTENT,
@@ -83,10 +89,31 @@ class SubscribeListViewSet(
     serializer_class = SubscribeSerializer
     filter_backends = (filters.SearchFilter,)
     search_fields = ('subscribing__username', 'subscriber__username')
-    pagination_class = LimitOffsetPagination
+    pagination_class = SubscribePagination
+    async_reads = True
 
     def get_queryset(self):
-        return self.request.user.subscriber.all()
+        recipes = Recipe.objects.order_by('-pub_date', '-id')
+        limit = self.request.query_params.get('recipes_limit')
+        if limit and limit.isdigit():
+            # последние N рецептов каждого автора одним запросом
+            # fmt: off
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(author=OuterRef('author'))
+                .order_by('-pub_date', '-id').values('pk')[:int(limit)]
+            ))
+            # fmt: on
+        return (
+            self.request.user.subscriber.select_related('subscribing')
+            .annotate(recipes_count=Count('subscribing__recipe'))
+            .prefetch_related(
+                Prefetch(
+                    'subscribing__recipe_set',
+                    queryset=recipes,
+                    to_attr='recent_recipes',
+                )
+            )
+        )
 
 
 class ChangePasswordView(generics.CreateAPIView):